@@ -1,6 +1,11 @@
-"""Скрипт для запуска приложения"""
+"""Скрипт для запуска приложения
+
+    python run.py            # компоненты создаются на первом запросе
+    python run.py --preload  # прогрев при старте: первый запрос без задержки
+"""
 import os
 import sys
+import argparse
 
 # Настройка кодировки для Windows
 if sys.platform == 'win32':
@@ -19,6 +24,17 @@ if not os.getenv("OPENAI_API_KEY"):
     print("\nContinuing startup, but functionality will be limited...")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Запуск DocReview AI API")
+    parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="Создать компоненты и схему OpenAPI до приема запросов"
+    )
+    args = parser.parse_args()
+    if args.preload:
+        # Через окружение - настройку увидит и процесс, перезапускаемый reload
+        os.environ["PRELOAD"] = "true"
+
     try:
         import uvicorn
         from src.config import settings
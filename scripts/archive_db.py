@@ -0,0 +1,55 @@
+"""Перенос старых месяцев проблем и результатов в Parquet-архив"""
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# Добавляем корень проекта в путь
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from src.db.partitions import add_months, month_start
+
+def archive(before: date):
+    """Выгрузить месяцы раньше before в ARCHIVE_DIR"""
+    from src.db.storage import create_storage_backend
+    
+    backend = create_storage_backend()
+    if backend is None:
+        raise RuntimeError("Архив работает только с постоянным хранилищем (STORAGE_BACKEND)")
+    
+    async def _archive():
+        try:
+            return await backend.archive_months(before)
+        finally:
+            await backend.close()
+    
+    months = asyncio.run(_archive())
+    print(f"Archive: {settings.archive_dir}")
+    if months:
+        print(f"✅ Archived months: {', '.join(f'{month:%Y-%m}' for month in months)}")
+    else:
+        print("Nothing to archive")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Архивация старых данных DocReview AI")
+    parser.add_argument(
+        "--before",
+        help="Архивировать месяцы раньше этого (YYYY-MM); по умолчанию - старше ARCHIVE_AFTER_MONTHS"
+    )
+    args = parser.parse_args()
+    
+    if args.before:
+        before = datetime.strptime(args.before, "%Y-%m").date()
+    else:
+        before = add_months(month_start(date.today()), -settings.archive_after_months)
+    
+    try:
+        archive(before)
+    except Exception as e:
+        print(f"❌ Error archiving data: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
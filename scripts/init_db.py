@@ -1,4 +1,6 @@
 """Скрипт для инициализации базы данных"""
+import argparse
+import asyncio
 import sys
 from pathlib import Path
 
@@ -7,26 +9,85 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.db.base import Base
-from src.db.session import engine
 from src.config import settings
 
 def init_db():
-    """Создание всех таблиц в БД"""
+    """Создание всех таблиц и месячных секций в PostgreSQL"""
+    from src.db.repository import ReviewRepository
+    from src.db.session import async_engine
+    
     print(f"Connecting to database: {settings.database_url.split('@')[1] if '@' in settings.database_url else 'local'}")
-    print("Creating tables...")
+    print("Creating tables and partitions...")
+    
+    # Асинхронная init_schema создает и секции: без них INSERT в issues и
+    # review_results падает с "no partition of relation found for row"
+    async def _init():
+        backend = ReviewRepository(async_engine)
+        await backend.init_schema()
+        await backend.close()
+    
+    asyncio.run(_init())
+    
+    print("✅ Database initialized successfully!")
+    print(f"Tables created: {list(Base.metadata.tables.keys())}")
+
+def init_sqlite(path: str):
+    """Создание всех таблиц во встроенной SQLite (WAL)"""
+    from src.db.sqlite import SQLiteRepository
     
-    # Создаем все таблицы
-    Base.metadata.create_all(bind=engine)
+    print(f"Initializing SQLite database: {path}")
+    
+    async def _init():
+        backend = SQLiteRepository(path)
+        await backend.init_schema()
+        await backend.close()
+    
+    asyncio.run(_init())
     
     print("✅ Database initialized successfully!")
     print(f"Tables created: {list(Base.metadata.tables.keys())}")
 
+def rebuild_issue_stats(backend_name: str, sqlite_path: str):
+    """Пересчет сводной статистики проблем по уже сохраненным issues"""
+    from src.db.storage import create_storage_backend
+    
+    async def _rebuild():
+        if backend_name == "sqlite":
+            from src.db.sqlite import SQLiteRepository
+            backend = SQLiteRepository(sqlite_path)
+        else:
+            backend = create_storage_backend("postgres")
+        await backend.rebuild_issue_stats()
+        await backend.close()
+    
+    asyncio.run(_rebuild())
+    print("✅ Issue stats rebuilt")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Инициализация хранилища DocReview AI")
+    parser.add_argument(
+        "--backend",
+        choices=["postgres", "sqlite"],
+        default="sqlite" if settings.storage_backend == "sqlite" else "postgres",
+        help="Какое хранилище инициализировать (по умолчанию - из STORAGE_BACKEND)"
+    )
+    parser.add_argument("--sqlite-path", default=settings.sqlite_path, help="Путь к файлу SQLite")
+    parser.add_argument(
+        "--rebuild-stats",
+        action="store_true",
+        help="Пересчитать сводную статистику проблем по существующим данным"
+    )
+    args = parser.parse_args()
+    
     try:
-        init_db()
+        if args.backend == "sqlite":
+            init_sqlite(args.sqlite_path)
+        else:
+            init_db()
+        if args.rebuild_stats:
+            rebuild_issue_stats(args.backend, args.sqlite_path)
     except Exception as e:
         print(f"❌ Error initializing database: {e}")
         import traceback
         traceback.print_exc()
         exit(1)
-
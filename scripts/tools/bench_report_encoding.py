@@ -0,0 +1,106 @@
+"""Бенчмарк сериализации и сжатия больших отчетов
+
+Сравнивает стандартный путь FastAPI (jsonable_encoder + json) с orjson и
+msgpack и показывает размер ответа без сжатия, с gzip и с brotli.
+
+    python scripts/tools/bench_report_encoding.py --issues 1000
+"""
+import sys
+import io
+import argparse
+import json
+import time
+import zlib
+from pathlib import Path
+from uuid import uuid4
+
+# Добавляем корень проекта в путь
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from src.config import settings
+from src.models import AgentType, Issue, Priority, ReviewResult, TaskStatus, ValidationResult
+
+# Настройка кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+
+def build_result(issues_count: int) -> ReviewResult:
+    """Результат с issues_count проблемами, тексты повторяются как в реальных отчетах"""
+    agents = list(AgentType)
+    priorities = list(Priority)
+    issues = [
+        Issue(
+            agent=agents[i % len(agents)],
+            priority=priorities[i % len(priorities)],
+            title=f"Проблема {i % 50}: отсутствует описание раздела",
+            description="Раздел документации не описывает обработку ошибок и граничные случаи. " * 3,
+            recommendation="Добавить описание кодов ошибок, таймаутов и повторных попыток.",
+            category=f"category-{i % 7}",
+            location=f"docs/section-{i}.md:{i % 300}"
+        )
+        for i in range(issues_count)
+    ]
+    return ReviewResult(
+        task_id=uuid4(),
+        status=TaskStatus.COMPLETED,
+        issues=issues,
+        summary=f"Найдено {issues_count} проблем",
+        validation_result=ValidationResult(is_valid=True, quality_score=0.8)
+    )
+
+
+def measure(func, repeat: int) -> float:
+    """Среднее время вызова, мс"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации отчетов")
+    parser.add_argument("--issues", type=int, default=1000, help="Проблем в отчете")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого замера")
+    args = parser.parse_args()
+
+    content = {"task_id": "bench", "format": "json", "report": build_result(args.issues).report_json}
+
+    encoders = {
+        "fastapi json": lambda: json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8"),
+        "orjson": lambda: orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS),
+    }
+    try:
+        import msgpack
+        encoders["msgpack"] = lambda: msgpack.packb(content, use_bin_type=True, default=str)
+    except ImportError:
+        print("msgpack не установлен - пропускаем")
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli не установлен - пропускаем")
+
+    print(f"Отчет: {args.issues} проблем, {args.repeat} повторов\n")
+    print(f"{'формат':<14}{'encode, мс':>12}{'байт':>12}{'gzip':>10}{'gzip, мс':>10}{'br':>10}{'br, мс':>10}")
+    for name, encode in encoders.items():
+        encode_ms = measure(encode, args.repeat)
+        body = encode()
+        gzip_body = zlib.compress(body, settings.gzip_level)
+        gzip_ms = measure(lambda: zlib.compress(body, settings.gzip_level), args.repeat)
+        row = f"{name:<14}{encode_ms:>12.2f}{len(body):>12}{len(gzip_body):>10}{gzip_ms:>10.2f}"
+        if brotli is not None:
+            br_body = brotli.compress(body, quality=settings.brotli_quality)
+            br_ms = measure(lambda: brotli.compress(body, quality=settings.brotli_quality), args.repeat)
+            row += f"{len(br_body):>10}{br_ms:>10.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
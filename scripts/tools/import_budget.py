@@ -0,0 +1,72 @@
+"""Бюджет времени импорта приложения
+
+Запускает `python -X importtime -c "import src.api.main"` в отдельном
+процессе и показывает самые дорогие модули по накопленному времени.
+С --budget-ms завершается с кодом 1, если импорт дольше бюджета -
+так можно проверять холодный старт в CI.
+
+    python scripts/tools/import_budget.py --top 20 --budget-ms 800
+"""
+import sys
+import io
+import argparse
+import subprocess
+from pathlib import Path
+from typing import List, Tuple
+
+# Корень проекта - рабочий каталог дочернего процесса
+project_root = Path(__file__).parent.parent.parent
+
+# Настройка кодировки для Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+
+def measure_imports(module: str) -> List[Tuple[str, int, int, int]]:
+    """(модуль, собственное мкс, накопленное мкс, глубина) по выводу -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Импорт {module} завершился ошибкой:\n{completed.stderr}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта приложения")
+    parser.add_argument("--module", default="src.api.main", help="Модуль для импорта")
+    parser.add_argument("--top", type=int, default=15, help="Сколько модулей показать")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Допустимое время импорта, мс")
+    args = parser.parse_args()
+
+    rows = measure_imports(args.module)
+    # Модуль верхнего уровня - последний в выводе, его накопленное время и есть весь импорт
+    total_ms = next(cumulative for name, _, cumulative, depth in reversed(rows) if name == args.module) / 1000
+
+    print(f"Импорт {args.module}: {total_ms:.0f} мс\n")
+    print(f"{'накоплено, мс':>14}{'свое, мс':>10}  модуль")
+    for name, self_us, cumulative_us, depth in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nБюджет превышен: {total_ms:.0f} мс > {args.budget_ms:.0f} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
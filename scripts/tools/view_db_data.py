@@ -124,7 +124,7 @@ def view_review_results(db, limit=10):
         print(f"    Статус: {result.status}")
         print(f"    Оценка качества: {result.quality_score or '-'}")
         print(f"    Резюме: {truncate_text(result.summary, 100)}")
-        print(f"    Отчет (Markdown, первые 150 символов): {truncate_text(result.report_markdown, 150)}")
+        print(f"    Результат (сжатый): {len(result.payload)} байт")
         print(f"    Создано: {format_datetime(result.created_at)}")
     
     total = db.query(ReviewResultDB).count()
@@ -1,6 +1,6 @@
 """Базовый класс для агентов"""
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List
 from src.models import ReviewTask, AnalysisResult, AgentType
 from src.utils.ai_client import AIClient
 
@@ -17,6 +17,15 @@ class BaseAgent(ABC):
         """Выполнить анализ документации"""
         pass
     
+    async def refine(
+        self,
+        task: ReviewTask,
+        context: Dict[str, Any],
+        feedback: List[str]
+    ) -> AnalysisResult:
+        """Повторный анализ с учетом замечаний Критика"""
+        return await self.analyze(task, {**(context or {}), "critic_feedback": feedback})
+    
     def _create_issue(
         self,
         title: str,
@@ -0,0 +1,169 @@
+"""Сжатие ответов API: brotli или gzip по заголовку Accept-Encoding"""
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен - без него сжимаем только gzip
+    brotli = None
+
+# События и уже сжатые данные не сжимаем
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/gzip", "application/zip", "image/")
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        # Сброс после каждой части, чтобы потоковая выгрузка доходила до клиента сразу
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br, gzip или None по Accept-Encoding (учитываются веса q)"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Сильный ETag представления с кодированием: "<tag>-<encoding>" (слабые не меняются)"""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def decoded_if_none_match(value: str, encoding: str) -> str:
+    """If-None-Match с тегами без суффикса кодирования - в том виде, в каком их считает приложение
+
+    Снимается только суффикс кодирования этого запроса: тег gzip-представления
+    не совпадет при запросе br.
+    """
+    suffix = f'-{encoding}"'
+    tags = []
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag.endswith(suffix):
+            tag = tag[:-len(suffix)] + '"'
+        tags.append(tag)
+    return ", ".join(tags)
+
+
+class CompressionMiddleware:
+    """Сжимает ответы крупнее minimum_size; brotli предпочтительнее gzip
+
+    Потоковые ответы сжимаются по частям. ETag остается сильным, но
+    получает суффикс кодирования, согласованного с клиентом (br/gzip) -
+    у 200 и у 304 одинаково, даже если короткое тело не сжималось.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match:
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, decoded_if_none_match(value.decode("latin-1"), encoding).encode("latin-1"))
+                if name == b"if-none-match" else (name, value)
+                for name, value in scope["headers"]
+            ]
+        await self.app(scope, receive, _CompressingSend(self, encoding, send))
+
+
+class _CompressingSend:
+    """send, сжимающий тело ответа"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = MutableHeaders(scope=message)
+            etag = headers.get("etag")
+            if etag and "content-encoding" not in headers:
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+                headers.add_vary_header("Accept-Encoding")
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            headers = MutableHeaders(scope=self.start)
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or self.start["status"] in (204, 206, 304)
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            self.encoder = (
+                _BrotliEncoder(self.middleware.brotli_quality) if self.encoding == "br"
+                else _GzipEncoder(self.middleware.gzip_level)
+            )
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(self.start)
+
+        body = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -1,18 +1,37 @@
 """FastAPI приложение"""
 import asyncio
+import hashlib
 import logging
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import Dict, Any, Optional
+import math
+import orjson
+from datetime import date, datetime
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Dict, Any, AsyncIterator, List, Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import AnyHttpUrl, BaseModel
 from src.config import settings
-from src.models import ReviewTask, ReviewResult, TaskStatus
+from src.api.compression import CompressionMiddleware
+from src.api.responses import ORJSONResponse, negotiated_response, wants_msgpack
+from src.models import ReviewTask, ReviewResult, ReviewBatch, TaskStatus, TaskLane, ValidationResult
 from src.core.director import Director
 from src.core.critic import Critic
 from src.core.synthesizer import Synthesizer
+from src.core.synthesizer.report import (
+    agent_results_dict, chunked, issue_dict, iter_markdown, iter_ndjson, render_json, render_markdown,
+    select_issues, validation_dict
+)
+from src.core.scheduler import Scheduler
 from src.agents.agent_factory import AgentFactory
-from src.models import AgentType
+from src.models import AgentType, AnalysisResult, Priority, IssueSearchPage, ResultSummary, WebhookDelivery
+from src.utils.bounded_store import BoundedStore
+from src.utils.cache import ReadThroughCache
+from src.utils.coalescer import RequestCoalescer
+from src.utils.latency import StageLatencies
+from src.utils.progress import ProgressEvent, ProgressHub, current_progress, format_sse, report_progress
+from src.utils.rate_limiter import llm_limiter
+from src.utils.token_usage import current_usage
+from src.utils.webhooks import MemoryWebhookOutbox, WebhookDispatcher, check_callback_url
 
 # Настройка логирования
 logging.basicConfig(
@@ -23,13 +42,25 @@ logging.basicConfig(
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=ORJSONResponse
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    gzip_level=settings.gzip_level,
+    brotli_quality=settings.brotli_quality
 )
 
 # Инициализация компонентов (ленивая инициализация)
 director = None
 critic = None
 synthesizer = None
+scheduler = None
+storage = None
+webhooks = None
+partition_maintenance = None  # Фоновое создание месячных секций
+cancellation_watch = None  # Фоновая проверка отмены своих задач другими воркерами
 
 def get_director():
     """Ленивая инициализация директора"""
@@ -52,9 +83,398 @@ def get_synthesizer():
         synthesizer = Synthesizer()
     return synthesizer
 
-# Хранилище задач (в продакшене использовалась бы БД)
-tasks_storage: Dict[UUID, ReviewTask] = {}
-results_storage: Dict[UUID, ReviewResult] = {}
+def get_scheduler():
+    """Ленивая инициализация планировщика"""
+    global scheduler
+    if scheduler is None:
+        scheduler = Scheduler()
+    return scheduler
+
+def get_storage():
+    """Ленивая инициализация постоянного хранилища (None для storage_backend=memory)"""
+    global storage
+    if storage is None and settings.storage_backend != "memory":
+        from src.db.storage import create_storage_backend
+        storage = create_storage_backend(settings.storage_backend)
+    return storage
+
+def get_webhooks():
+    """Ленивая инициализация доставки уведомлений (очередь - постоянное хранилище или память)"""
+    global webhooks
+    if webhooks is None:
+        webhooks = WebhookDispatcher(
+            get_storage() or MemoryWebhookOutbox(),
+            secret=settings.webhook_secret,
+            timeout=settings.webhook_timeout,
+            max_attempts=settings.webhook_max_attempts,
+            backoff_base=settings.webhook_backoff_base,
+            backoff_max=settings.webhook_backoff_max,
+            poll_interval=settings.webhook_poll_interval,
+            batch_size=settings.webhook_batch_size,
+            max_concurrent=settings.webhook_max_concurrent,
+            allowed_hosts=settings.webhook_allowed_hosts,
+            allow_private=settings.webhook_allow_private
+        )
+    return webhooks
+
+# Финальные статусы задачи
+FINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+# Рабочий набор задач процесса; при постоянном хранилище источник истины - оно.
+# Хранилища ограничены по размеру и TTL, выполняющиеся задачи не вытесняются.
+tasks_storage: Dict[UUID, ReviewTask] = BoundedStore(
+    max_entries=settings.task_store_max_entries,
+    max_bytes=settings.task_store_max_bytes,
+    ttl=settings.task_store_ttl,
+    sizeof=lambda task: len(task.document),
+    evictable=lambda task: task.status in FINAL_STATUSES
+)
+results_storage: Dict[UUID, ReviewResult] = BoundedStore(
+    max_entries=settings.result_store_max_entries,
+    max_bytes=settings.result_store_max_bytes,
+    ttl=settings.result_store_ttl,
+    sizeof=lambda result: result.approx_size()
+)
+# Построенные отчеты по (task_id, формат): размер считается по готовому отчету
+rendered_reports: Dict[tuple, Any] = BoundedStore(
+    max_entries=settings.report_cache_max_entries,
+    max_bytes=settings.report_cache_max_bytes,
+    ttl=settings.result_store_ttl,
+    sizeof=lambda report: len(report) if isinstance(report, str) else len(orjson.dumps(report))
+)
+batches_storage: Dict[UUID, ReviewBatch] = BoundedStore(
+    max_entries=settings.task_store_max_entries,
+    ttl=settings.task_store_ttl
+)
+# Выполняющиеся задачи (для отмены)
+running_reviews: Dict[UUID, asyncio.Task] = {}
+# Одинаковые одновременные задачи разделяют один прогон пайплайна
+coalescer = RequestCoalescer()
+# Кэш чтения статусов и результатов перед постоянным хранилищем
+read_cache = ReadThroughCache(
+    max_entries=settings.cache_local_max_entries,
+    redis_url=settings.redis_url if settings.cache_redis_enabled else None,
+    max_connections=settings.redis_max_connections,
+    pool_timeout=settings.redis_pool_timeout
+)
+# События хода анализа для подписчиков /events
+progress = ProgressHub(
+    history_size=settings.progress_history_size,
+    retention=settings.progress_retention,
+    max_channels=settings.task_store_max_entries
+)
+# Наблюдаемая длительность этапов пайплайна - для оценки времени и Retry-After
+stage_latencies = StageLatencies(
+    default_total=settings.default_review_seconds,
+    alpha=settings.stage_latency_alpha
+)
+
+
+def status_key(task_id: UUID) -> str:
+    """Ключ статуса задачи в кэше"""
+    return f"docreview:status:{task_id}"
+
+
+def result_key(task_id: UUID) -> str:
+    """Ключ результата задачи в кэше"""
+    return f"docreview:result:{task_id}"
+
+
+async def cache_statuses(statuses: Dict[UUID, TaskStatus]):
+    """Записать статусы в кэш: финальные надолго, остальные на status_cache_ttl"""
+    final, active = {}, {}
+    for task_id, status in statuses.items():
+        (final if status in FINAL_STATUSES else active)[status_key(task_id)] = status.value
+    await read_cache.set_many(final, settings.redis_cache_ttl)
+    # В Redis статус обновляется при каждой смене, локальная копия живет коротко
+    await read_cache.set_many(active, settings.redis_cache_ttl, local_ttl=settings.status_cache_ttl)
+
+
+async def save_tasks(tasks: List[ReviewTask], batch: Optional[ReviewBatch] = None):
+    """Сохранить новые задачи и их пакет (память и БД)"""
+    for task in tasks:
+        tasks_storage[task.id] = task
+    if batch is not None:
+        batches_storage[batch.id] = batch
+    backend = get_storage()
+    if backend is not None:
+        await backend.save_tasks(tasks, batch=batch)
+
+
+async def load_batch(batch_id: UUID) -> Optional[ReviewBatch]:
+    """Пакет из памяти процесса, иначе из БД (пакет создан другим воркером или до перезапуска)"""
+    batch = batches_storage.get(batch_id)
+    if batch is None:
+        backend = get_storage()
+        if backend is not None:
+            batch = await backend.get_batch(batch_id)
+            if batch is not None:
+                batches_storage[batch_id] = batch
+    return batch
+
+
+async def set_status(tasks: List[ReviewTask], status: TaskStatus):
+    """Сменить статус задач (память и БД)"""
+    for task in tasks:
+        task.status = status
+        progress.publish(task.id, "status", {"status": status.value}, final=status in FINAL_STATUSES)
+    backend = get_storage()
+    if backend is not None:
+        await backend.update_status([task.id for task in tasks], status)
+        # За время записи задачу могли отменить - в кэш идет актуальный статус
+        await cache_statuses({task.id: task.status for task in tasks})
+
+
+async def save_result(task: ReviewTask, result: ReviewResult):
+    """Сохранить результат и завершить задачу (память и БД); отмененную задачу не трогает"""
+    if task.status == TaskStatus.CANCELLED:
+        return
+    deliveries = task_webhooks(task, "review.completed", result)
+    backend = get_storage()
+    if backend is not None:
+        # Уведомление попадает в очередь в одной транзакции с результатом
+        await backend.save_result(result, user_email=task.user_email, webhooks=deliveries)
+        # Результат неизменен: локально он уже в results_storage, в кэше - для других воркеров
+        await read_cache.set(
+            result_key(task.id), result.model_dump_json(), settings.redis_cache_ttl, local_ttl=0
+        )
+        await cache_statuses({task.id: TaskStatus.COMPLETED})
+    results_storage[task.id] = result
+    task.status = TaskStatus.COMPLETED
+    progress.publish(task.id, "result", result_event(result))
+    progress.publish(task.id, "status", {"status": TaskStatus.COMPLETED.value}, final=True)
+    if deliveries:
+        if backend is None:
+            await get_webhooks().outbox.enqueue_webhooks(deliveries)
+        dispatch_webhooks()
+
+
+async def notify_failure(task: ReviewTask):
+    """Поставить уведомление о сбое анализа в очередь"""
+    deliveries = task_webhooks(task, "review.failed")
+    if deliveries:
+        await get_webhooks().outbox.enqueue_webhooks(deliveries)
+        dispatch_webhooks()
+
+
+def task_webhooks(task: ReviewTask, event: str, result: Optional[ReviewResult] = None) -> List[WebhookDelivery]:
+    """Уведомление для callback_url задачи (пустой список, если адрес не задан)"""
+    if not task.callback_url:
+        return []
+    payload = {
+        "event": event,
+        "task_id": str(task.id),
+        "status": task.status.value if result is None else TaskStatus.COMPLETED.value,
+        "results_url": f"/api/v1/review/{task.id}/results"
+    }
+    if result is not None:
+        payload.update({
+            "summary": result.summary,
+            "issues_count": len(result.issues),
+            "quality_score": result.validation_result.quality_score if result.validation_result else None
+        })
+    return [WebhookDelivery(task_id=task.id, url=task.callback_url, event=event, payload=payload)]
+
+
+def dispatch_webhooks():
+    """Разбудить фоновую доставку уведомлений (запустив ее при первом вызове)"""
+    dispatcher = get_webhooks()
+    dispatcher.start()
+    dispatcher.notify()
+
+
+def result_event(result: ReviewResult) -> Dict[str, Any]:
+    """Итог анализа для потока событий"""
+    return {
+        "summary": result.summary,
+        "issues_count": len(result.issues),
+        "quality_score": result.validation_result.quality_score if result.validation_result else None,
+        "issues": [issue.model_dump(mode="json") for issue in result.issues]
+    }
+
+
+async def load_statuses(task_ids: List[UUID]) -> Dict[UUID, TaskStatus]:
+    """Статусы задач: из памяти, затем из кэша, недостающие - одним запросом к БД"""
+    statuses = {
+        task_id: tasks_storage[task_id].status
+        for task_id in task_ids if task_id in tasks_storage
+    }
+    missing = [task_id for task_id in task_ids if task_id not in statuses]
+    backend = get_storage()
+    if not missing or backend is None:
+        return statuses
+
+    cached = await read_cache.get_many(status_key(task_id) for task_id in missing)
+    for task_id in missing:
+        value = cached.get(status_key(task_id))
+        if value is not None:
+            statuses[task_id] = TaskStatus(value)
+    missing = [task_id for task_id in missing if task_id not in statuses]
+    if missing:
+        loaded = await backend.get_statuses(missing)
+        await cache_statuses(loaded)
+        statuses.update(loaded)
+    return statuses
+
+
+# Построение отчета по формату
+REPORT_RENDERERS = {
+    "markdown": render_markdown,
+    "json": render_json
+}
+
+
+def rendered_report(result: ReviewResult, format: str = "json") -> Any:
+    """Отчет результата из кэша отчетов, при промахе - построить и запомнить"""
+    key = (result.task_id, format)
+    report = rendered_reports.get(key)
+    if report is None:
+        report = REPORT_RENDERERS[format](result)
+        rendered_reports[key] = report
+    return report
+
+
+def has_result(task_id: UUID, status: TaskStatus) -> bool:
+    """Можно ли получить результат задачи
+
+    В БД результат сохраняется в одной транзакции со статусом completed.
+    Без БД результат мог быть уже вытеснен из памяти, а статус - еще нет.
+    """
+    if status != TaskStatus.COMPLETED:
+        return False
+    return get_storage() is not None or task_id in results_storage
+
+
+async def load_result(task_id: UUID) -> Optional[ReviewResult]:
+    """Результат: из памяти, затем из кэша, иначе из БД"""
+    result = results_storage.get(task_id)
+    backend = get_storage()
+    if result is not None or backend is None:
+        return result
+
+    cached = await read_cache.get(result_key(task_id))
+    if cached is not None:
+        result = ReviewResult.model_validate_json(cached)
+    else:
+        result = await backend.get_result(task_id)
+        if result is None:
+            return None
+        await read_cache.set(
+            result_key(task_id), result.model_dump_json(), settings.redis_cache_ttl, local_ttl=0
+        )
+    # Результаты неизменны - держим в памяти процесса до вытеснения
+    results_storage[task_id] = result
+    return result
+
+
+async def load_result_summaries(task_ids: List[UUID]) -> Dict[UUID, ResultSummary]:
+    """Краткие итоги завершенных задач: из памяти, недостающие - одним запросом к БД"""
+    summaries = {
+        task_id: ResultSummary.of(results_storage[task_id])
+        for task_id in task_ids if task_id in results_storage
+    }
+    missing = [task_id for task_id in task_ids if task_id not in summaries]
+    backend = get_storage()
+    if not missing or backend is None:
+        return summaries
+    summaries.update(await backend.get_result_summaries(missing))
+    # Результаты, выгруженные в архив, читаются целиком
+    for task_id in missing:
+        if task_id not in summaries:
+            result = await load_result(task_id)
+            if result is not None:
+                summaries[task_id] = ResultSummary.of(result)
+    return summaries
+
+
+def warm_up():
+    """Создать компоненты заранее, чтобы первый запрос не платил за инициализацию"""
+    get_director()
+    get_critic()
+    get_synthesizer()
+    get_scheduler()
+    get_storage()
+    app.openapi()
+
+
+@app.on_event("startup")
+async def preload_components():
+    """Прогрев при старте (settings.preload / run.py --preload)"""
+    if settings.preload:
+        warm_up()
+
+
+async def maintain_partitions_periodically(backend):
+    """Досоздавать месячные секции, пока процесс работает (месяцы сменяются без перезапуска)"""
+    logger = logging.getLogger(__name__)
+    while True:
+        try:
+            await backend.maintain_partitions()
+        except Exception as e:
+            logger.warning(f"Не удалось создать секции на следующие месяцы: {e}")
+        await asyncio.sleep(settings.partition_maintenance_interval)
+
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    """Секции на текущий и следующие месяцы - до первых записей"""
+    global partition_maintenance
+    backend = get_storage()
+    if backend is not None:
+        partition_maintenance = asyncio.create_task(maintain_partitions_periodically(backend))
+
+
+async def watch_cancellations(backend):
+    """Прерывать свои пайплайны, отмененные через другой воркер
+
+    Одним запросом к БД проверяются все задачи, выполняющиеся в процессе.
+    """
+    logger = logging.getLogger(__name__)
+    while True:
+        await asyncio.sleep(settings.cancel_poll_interval)
+        task_ids = [task_id for task_id, pipeline in running_reviews.items() if not pipeline.done()]
+        if not task_ids:
+            continue
+        try:
+            statuses = await backend.get_statuses(task_ids)
+        except Exception as e:
+            logger.warning(f"Не удалось проверить отмену задач: {e}")
+            continue
+        for task_id, status in statuses.items():
+            task = tasks_storage.get(task_id)
+            if status == TaskStatus.CANCELLED and task is not None and task.status not in FINAL_STATUSES:
+                stop_review(task)
+                await set_status([task], TaskStatus.CANCELLED)
+
+
+@app.on_event("startup")
+async def start_cancellation_watch():
+    """Отмена с любого воркера доходит до воркера, выполняющего задачу"""
+    global cancellation_watch
+    backend = get_storage()
+    if backend is not None:
+        cancellation_watch = asyncio.create_task(watch_cancellations(backend))
+
+
+@app.on_event("startup")
+async def start_webhooks():
+    """Продолжить доставку уведомлений, оставшихся в очереди с прошлого запуска"""
+    if get_storage() is not None:
+        get_webhooks().start()
+
+
+@app.on_event("shutdown")
+async def close_storage():
+    """Дописать отложенные записи хранилища и закрыть кэш при остановке"""
+    if partition_maintenance is not None:
+        partition_maintenance.cancel()
+    if cancellation_watch is not None:
+        cancellation_watch.cancel()
+    if webhooks is not None:
+        await webhooks.stop()
+    if storage is not None:
+        await storage.close()
+    await read_cache.close()
 
 
 @app.get("/")
@@ -72,11 +492,64 @@ async def health():
     return {"status": "healthy"}
 
 
+def estimate_completion(ahead: int) -> int:
+    """Секунд до завершения новой задачи, перед которой в очереди ahead задач"""
+    scheduler_instance = get_scheduler()
+    pipeline = stage_latencies.total()
+    # Слоты освобождаются в среднем раз в pipeline / max_concurrent секунд
+    backlog = max(0, scheduler_instance.active + ahead + 1 - scheduler_instance.max_concurrent)
+    return math.ceil(backlog * pipeline / scheduler_instance.max_concurrent + pipeline)
+
+
+def check_admission(count: int = 1):
+    """Отказ 429 с Retry-After, если очередь планировщика или лимитер LLM насыщены
+    
+    Лишняя задача в насыщенной очереди все равно не успела бы завершиться
+    вовремя - клиенту честнее сразу сказать, когда повторить.
+    """
+    scheduler_instance = get_scheduler()
+    excess = scheduler_instance.queued() + count - settings.admission_max_queued
+    if excess > 0:
+        detail = "Очередь анализа заполнена"
+        retry_after = excess * stage_latencies.total() / scheduler_instance.max_concurrent
+    elif llm_limiter.waiting >= settings.admission_max_llm_waiting:
+        detail = "Лимит запросов к LLM исчерпан"
+        retry_after = llm_limiter.drain_time(llm_limiter.waiting - settings.admission_max_llm_waiting + 1)
+    else:
+        return
+    retry_after = min(max(math.ceil(retry_after), 1), settings.admission_retry_after_max)
+    raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+def estimate_remaining(task_id: UUID, status: TaskStatus) -> Optional[int]:
+    """Оставшееся время задачи этого процесса (None - задача в другом процессе или завершена)"""
+    if status in FINAL_STATUSES or task_id not in running_reviews:
+        return None
+    if status == TaskStatus.PENDING:
+        # Позиция конкретной задачи в справедливой очереди не фиксирована - оценка сверху
+        return estimate_completion(get_scheduler().queued() - 1)
+    stage = progress.latest(task_id, "stage")
+    return math.ceil(stage_latencies.remaining(stage[2].get("stage") if stage else None))
+
+
+async def validate_callback_url(url: Optional[AnyHttpUrl]) -> Optional[str]:
+    """Адрес уведомления строкой; 400, если он ведет во внутреннюю сеть или не разрешен"""
+    if url is None:
+        return None
+    reason = await check_callback_url(str(url), settings.webhook_allowed_hosts, settings.webhook_allow_private)
+    if reason is not None:
+        raise HTTPException(status_code=400, detail=f"Недопустимый callback_url: {reason}")
+    return str(url)
+
+
 class ReviewRequest(BaseModel):
     """Запрос на анализ"""
     document: str
     document_type: str = "markdown"
     context: Optional[Dict[str, Any]] = None
+    user_email: Optional[str] = None  # Тенант: очередь и квоты считаются по нему
+    lane: TaskLane = TaskLane.INTERACTIVE
+    callback_url: Optional[AnyHttpUrl] = None  # POST с итогом по завершении анализа
 
 
 @app.post("/api/v1/review/start")
@@ -84,15 +557,26 @@ async def start_review(
     request: ReviewRequest,
     background_tasks: BackgroundTasks
 ) -> Dict[str, Any]:
-    """Запуск анализа документации"""
+    """Запуск анализа документации
+    
+    При насыщенной очереди или лимитере LLM - 429 с Retry-After.
+    estimated_time - оценка по текущей очереди и замеренной длительности этапов.
+    """
+    
+    callback_url = await validate_callback_url(request.callback_url)
+    check_admission()
+    ahead = get_scheduler().queued()
     
     # Создаем задачу
     task = ReviewTask(
         document=request.document,
         document_type=request.document_type,
-        context=request.context or {}
+        context=request.context or {},
+        user_email=request.user_email,
+        lane=request.lane,
+        callback_url=callback_url
     )
-    tasks_storage[task.id] = task
+    await save_tasks([task])
     
     # Запускаем анализ в фоне
     if background_tasks:
@@ -101,67 +585,647 @@ async def start_review(
     return {
         "task_id": str(task.id),
         "status": "started",
-        "estimated_time": 180  # ~3 минуты
+        "queued_ahead": ahead,
+        "estimated_time": estimate_completion(ahead)
+    }
+
+
+class BatchDocument(BaseModel):
+    """Документ в пакете"""
+    document: str
+    document_type: str = "markdown"
+    context: Optional[Dict[str, Any]] = None  # Дополняет общий контекст пакета
+
+
+class BatchReviewRequest(BaseModel):
+    """Запрос на пакетный анализ"""
+    documents: List[BatchDocument]
+    context: Optional[Dict[str, Any]] = None
+    user_email: Optional[str] = None
+    lane: TaskLane = TaskLane.BATCH
+    callback_url: Optional[AnyHttpUrl] = None  # Уведомление о завершении каждого документа
+
+
+@app.post("/api/v1/review/batch")
+async def start_batch_review(
+    request: BatchReviewRequest,
+    background_tasks: BackgroundTasks
+) -> Dict[str, Any]:
+    """Запуск пакетного анализа документов с общим контекстом"""
+    
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="Пакет не содержит документов")
+    if len(request.documents) > settings.batch_max_documents:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много документов в пакете (максимум {settings.batch_max_documents})"
+        )
+    callback_url = await validate_callback_url(request.callback_url)
+    check_admission(len(request.documents))
+    ahead = get_scheduler().queued()
+    
+    shared_context = request.context or {}
+    tasks = [
+        ReviewTask(
+            document=item.document,
+            document_type=item.document_type,
+            context={**shared_context, **(item.context or {})},
+            user_email=request.user_email,
+            lane=request.lane,
+            callback_url=callback_url
+        )
+        for item in request.documents
+    ]
+    batch = ReviewBatch(
+        task_ids=[task.id for task in tasks],
+        context=shared_context,
+        user_email=request.user_email
+    )
+    await save_tasks(tasks, batch=batch)
+    
+    # Все задачи пакета идут через общий планировщик
+    background_tasks.add_task(process_batch, list(batch.task_ids))
+    
+    return {
+        "batch_id": str(batch.id),
+        "task_ids": [str(task_id) for task_id in batch.task_ids],
+        "status": "started",
+        # Оценка для последнего документа пакета
+        "estimated_time": estimate_completion(ahead + len(tasks) - 1)
+    }
+
+
+@app.get("/api/v1/review/batch/{batch_id}")
+async def get_batch_status(batch_id: UUID) -> Dict[str, Any]:
+    """Прогресс пакетного анализа"""
+    
+    batch = await load_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Пакет не найден")
+    
+    statuses = await load_statuses(batch.task_ids)
+    counts = {status.value: 0 for status in TaskStatus}
+    tasks = []
+    for task_id in batch.task_ids:
+        status = statuses.get(task_id, TaskStatus.FAILED).value
+        counts[status] += 1
+        tasks.append({"task_id": str(task_id), "status": status})
+    
+    finished = sum(counts[status.value] for status in FINAL_STATUSES)
+    return {
+        "batch_id": str(batch_id),
+        "total": len(batch.task_ids),
+        "counts": counts,
+        "progress": finished / len(batch.task_ids),
+        "done": finished == len(batch.task_ids),
+        "tasks": tasks
+    }
+
+
+@app.get("/api/v1/review/batch/{batch_id}/results")
+async def get_batch_results(
+    batch_id: UUID,
+    include_reports: bool = False,
+    accept: Optional[str] = Header(None)
+) -> Response:
+    """Результаты всех задач пакета одним ответом (JSON или msgpack)
+    
+    Итоги читаются одним запросом без проблем; полные результаты
+    загружаются только с include_reports.
+    """
+    
+    batch = await load_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Пакет не найден")
+    
+    statuses = await load_statuses(batch.task_ids)
+    completed = [task_id for task_id in batch.task_ids if statuses.get(task_id) == TaskStatus.COMPLETED]
+    summaries = await load_result_summaries(completed)
+    results = []
+    for task_id in batch.task_ids:
+        status = statuses.get(task_id, TaskStatus.FAILED)
+        item = {
+            "task_id": str(task_id),
+            "status": status.value
+        }
+        summary = summaries.get(task_id)
+        if summary is not None:
+            item.update(summary.model_dump(mode="json", include={"summary", "issues_count", "quality_score"}))
+            if include_reports:
+                result = await load_result(task_id)
+                item["report_json"] = rendered_report(result) if result else None
+        results.append(item)
+    
+    return negotiated_response({
+        "batch_id": str(batch_id),
+        "results": results
+    }, accept)
+
+
+# Поля /review/status:batch; поля итога читаются без проблем и отчетов
+STATUS_BATCH_FIELDS = ("status", "has_result", "summary", "issues_count", "quality_score", "created_at", "report_json")
+SUMMARY_FIELDS = ("summary", "issues_count", "quality_score", "created_at")
+
+
+class StatusBatchRequest(BaseModel):
+    """Запрос статусов нескольких задач"""
+    task_ids: List[UUID]
+    fields: List[str] = ["status", "has_result"]
+
+
+@app.post("/api/v1/review/status:batch")
+async def get_statuses_batch(
+    request: StatusBatchRequest,
+    accept: Optional[str] = Header(None)
+) -> Response:
+    """Статусы и (по fields) итоги нескольких задач одним запросом
+    
+    Поля итога (summary, issues_count, quality_score, created_at) читаются
+    одним запросом без проблем и отчетов; report_json загружает результаты
+    целиком - запрашивайте его, только если он нужен.
+    """
+    
+    if len(request.task_ids) > settings.status_batch_max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Не больше {settings.status_batch_max_ids} задач в запросе"
+        )
+    unknown = set(request.fields) - set(STATUS_BATCH_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    
+    fields = set(request.fields)
+    task_ids = list(dict.fromkeys(request.task_ids))
+    statuses = await load_statuses(task_ids)
+    completed = [task_id for task_id in task_ids if statuses.get(task_id) == TaskStatus.COMPLETED]
+    summaries = await load_result_summaries(completed) if fields & set(SUMMARY_FIELDS) else {}
+    
+    tasks = []
+    for task_id in task_ids:
+        status = statuses.get(task_id)
+        if status is None:
+            continue
+        item = {"task_id": str(task_id)}
+        if "status" in fields:
+            item["status"] = status.value
+        if "has_result" in fields:
+            item["has_result"] = has_result(task_id, status)
+        summary = summaries.get(task_id)
+        if summary is not None:
+            item.update(summary.model_dump(mode="json", include=fields & set(SUMMARY_FIELDS)))
+        if "report_json" in fields and status == TaskStatus.COMPLETED:
+            result = await load_result(task_id)
+            item["report_json"] = rendered_report(result) if result else None
+        tasks.append(item)
+    
+    return negotiated_response({
+        "tasks": tasks,
+        "not_found": [str(task_id) for task_id in task_ids if task_id not in statuses]
+    }, accept)
+
+
+@app.get("/api/v1/scheduler/stats")
+async def get_scheduler_stats() -> Dict[str, Any]:
+    """Состояние очереди планировщика, лимитера LLM и длительность этапов"""
+    return {
+        **get_scheduler().stats(),
+        "llm": llm_limiter.stats(),
+        "stage_latency": stage_latencies.stats()
+    }
+
+
+@app.get("/api/v1/storage/stats")
+async def get_storage_stats() -> Dict[str, Any]:
+    """Заполненность in-memory хранилищ"""
+    return {
+        "tasks": tasks_storage.stats(),
+        "results": results_storage.stats(),
+        "batches": batches_storage.stats(),
+        "read_cache": read_cache.stats(),
+        "progress": progress.stats(),
+        "webhooks": webhooks.stats() if webhooks is not None else None
+    }
+
+
+@app.get("/api/v1/pools/stats")
+async def get_pool_stats() -> Dict[str, Any]:
+    """Пулы соединений БД и Redis: занятые соединения, ожидание, переполнение"""
+    backend = get_storage()
+    return {
+        "database": backend.pool_stats() if backend is not None else {},
+        "redis": read_cache.pool_stats()
+    }
+
+
+@app.get("/api/v1/issues/search")
+async def search_issues(
+    priority: Optional[List[Priority]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    agent: Optional[List[AgentType]] = Query(None),
+    user_email: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1)
+) -> IssueSearchPage:
+    """Поиск проблем по всем анализам (новые первыми, постранично по cursor)"""
+    
+    backend = get_storage()
+    if backend is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Поиск доступен только с постоянным хранилищем (STORAGE_BACKEND)"
+        )
+    
+    try:
+        return await backend.search_issues(
+            priorities=[item.value for item in priority] if priority else None,
+            categories=category,
+            agents=[item.value for item in agent] if agent else None,
+            user_email=user_email,
+            created_from=created_from,
+            created_to=created_to,
+            text=q,
+            cursor=cursor,
+            limit=min(limit, settings.issue_search_max_limit)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/v1/issues/stats")
+async def get_issue_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    group_by: List[str] = Query(["day"])
+) -> Dict[str, Any]:
+    """Статистика проблем по дням, категориям, агентам и приоритетам"""
+    
+    backend = get_storage()
+    if backend is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Статистика доступна только с постоянным хранилищем (STORAGE_BACKEND)"
+        )
+    
+    try:
+        buckets = await backend.issue_stats(date_from, date_to, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "group_by": group_by,
+        "total": sum(bucket.count for bucket in buckets),
+        "buckets": [bucket.model_dump(include=set(group_by) | {"count"}) for bucket in buckets]
     }
 
 
 @app.get("/api/v1/review/{task_id}/status")
-async def get_review_status(task_id: UUID) -> Dict[str, Any]:
-    """Получение статуса анализа"""
+async def get_review_status(
+    task_id: UUID,
+    wait: float = Query(0, ge=0, description="Секунд ожидания смены статуса (long-poll)"),
+    since: Optional[int] = Query(None, description="version из предыдущего ответа")
+) -> Dict[str, Any]:
+    """Получение статуса анализа
+    
+    С wait ответ задерживается до смены статуса после версии since (без since -
+    после текущей) или до истечения wait. Задачи этого процесса ждут события
+    канала; задачи других воркеров - смены статуса в кэше и БД (опрос раз в
+    SSE_POLL_INTERVAL), их version всегда 0.
+    """
+    
+    status = (await load_statuses([task_id])).get(task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    version = progress.version(task_id)
+    timeout = min(wait, settings.status_max_wait)
+    if wait and status not in FINAL_STATUSES and task_id in tasks_storage:
+        if since is None or since >= version:
+            changed = await progress.wait(task_id, version, timeout=timeout)
+            if changed is not None:
+                version = changed[0]
+        status = tasks_storage[task_id].status if task_id in tasks_storage else status
+    elif wait and status not in FINAL_STATUSES:
+        status = await poll_status_change(task_id, status, timeout)
+    
+    response = {
+        "task_id": str(task_id),
+        "status": status.value,
+        "version": version,
+        "has_result": has_result(task_id, status)
+    }
+    remaining = estimate_remaining(task_id, status)
+    if remaining is not None:
+        response["estimated_time"] = remaining
+    return response
+
+
+@app.get("/api/v1/review/{task_id}/events")
+async def stream_review_events(
+    task_id: UUID,
+    last_event_id: Optional[str] = Header(None)
+) -> StreamingResponse:
+    """Поток событий анализа (Server-Sent Events): этапы, проблемы агентов и итог
+    
+    Поток закрывается финальным статусом. Last-Event-ID продолжает поток после
+    переподключения без повтора уже полученных событий.
+    """
+    
+    status = (await load_statuses([task_id])).get(task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    try:
+        after = int(last_event_id or 0)
+    except ValueError:
+        after = 0
+    if progress.has_channel(task_id) or (task_id in tasks_storage and status not in FINAL_STATUSES):
+        events = progress.subscribe(task_id, after, heartbeat=settings.sse_heartbeat_interval)
+    else:
+        # Задача выполняется другим воркером или давно завершена - следим за статусом
+        events = poll_progress(task_id, status)
+    
+    return StreamingResponse(
+        sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def sse_stream(events: AsyncIterator[Optional[ProgressEvent]]) -> AsyncIterator[str]:
+    """События в формате text/event-stream; None - комментарий-пульс для прокси"""
+    async for item in events:
+        yield ": ping\n\n" if item is None else format_sse(*item)
+
+
+async def poll_progress(task_id: UUID, status: TaskStatus) -> AsyncIterator[Optional[ProgressEvent]]:
+    """События задачи без локального канала: смены статуса опросом кэша и БД"""
+    loop = asyncio.get_running_loop()
+    event_id, last_status = 0, None
+    quiet_since = loop.time()
+    while True:
+        if status != last_status:
+            if status == TaskStatus.COMPLETED:
+                result = await load_result(task_id)
+                if result is not None:
+                    event_id += 1
+                    yield event_id, "result", result_event(result)
+            event_id += 1
+            yield event_id, "status", {"status": status.value}
+            last_status = status
+            quiet_since = loop.time()
+        elif loop.time() - quiet_since >= settings.sse_heartbeat_interval:
+            yield None
+            quiet_since = loop.time()
+        if status in FINAL_STATUSES:
+            return
+        await asyncio.sleep(settings.sse_poll_interval)
+        status = (await load_statuses([task_id])).get(task_id, status)
+
+
+async def poll_status_change(task_id: UUID, status: TaskStatus, timeout: float) -> TaskStatus:
+    """Статус задачи другого воркера после смены или по истечении timeout (опрос кэша и БД)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return status
+        await asyncio.sleep(min(settings.sse_poll_interval, remaining))
+        current = (await load_statuses([task_id])).get(task_id, status)
+        if current != status:
+            return current
+
+
+def stop_review(task: ReviewTask):
+    """Пометить задачу отмененной и прервать ее пайплайн в этом процессе
+
+    Статус в памяти и отмена пайплайна - до первого await: иначе пайплайн
+    успеет перезаписать статус или сохранить результат, пока пишется БД.
+    """
+    task.status = TaskStatus.CANCELLED
+    pipeline = running_reviews.get(task.id)
+    if pipeline is not None:
+        pipeline.cancel()
+
+
+async def cancel_remote_review(task_id: UUID) -> Dict[str, Any]:
+    """Отмена задачи другого воркера: статус пишется в БД, воркер-владелец
+    замечает его при очередной проверке (CANCEL_POLL_INTERVAL) и прерывает пайплайн"""
+    backend = get_storage()
+    status = (await load_statuses([task_id])).get(task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if status not in FINAL_STATUSES:
+        # БД не даст перезаписать отменой готовый итог - отвечаем по тому, что записалось
+        await backend.update_status([task_id], TaskStatus.CANCELLED)
+        status = (await backend.get_statuses([task_id])).get(task_id, status)
+        await cache_statuses({task_id: status})
+    if status != TaskStatus.CANCELLED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Задача уже завершена со статусом {status.value}"
+        )
+    return {
+        "task_id": str(task_id),
+        "status": status.value
+    }
+
+
+@app.delete("/api/v1/review/{task_id}")
+@app.post("/api/v1/review/{task_id}/cancel")
+async def cancel_review(task_id: UUID) -> Dict[str, Any]:
+    """Отмена анализа: прерывает вызовы LLM и освобождает слот планировщика"""
     
     task = tasks_storage.get(task_id)
     if not task:
-        raise HTTPException(status_code=404, detail="Задача не найдена")
+        return await cancel_remote_review(task_id)
+    if task.status in FINAL_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Задача уже завершена со статусом {task.status.value}"
+        )
     
-    result = results_storage.get(task_id)
+    stop_review(task)
+    await set_status([task], TaskStatus.CANCELLED)
     
     return {
         "task_id": str(task_id),
-        "status": task.status.value,
-        "has_result": result is not None
+        "status": task.status.value
     }
 
 
+def result_etag(result: ReviewResult, representation: str, accept: Optional[str] = None) -> str:
+    """Сильный ETag представления результата (JSON и msgpack - разные представления)"""
+    if wants_msgpack(accept):
+        representation = f"{representation}-msgpack"
+    return f'"{result.content_hash[:32]}-{representation}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (сравнение слабое, по RFC 9110)"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def immutable_response(content: Any, etag: str, accept: Optional[str] = None) -> Response:
+    """Ответ с результатом: ETag и Cache-Control для прокси и CDN"""
+    return negotiated_response(
+        content,
+        accept,
+        headers={"ETag": etag, "Cache-Control": settings.result_cache_control}
+    )
+
+
+def not_modified_response(etag: str) -> Response:
+    """304 без тела - клиент или прокси отдают свою копию"""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": settings.result_cache_control, "Vary": "Accept"}
+    )
+
+
+# Поля /results: значение строится, только если поле запрошено
+RESULT_FIELDS = {
+    "task_id": lambda result: str(result.task_id),
+    "status": lambda result: result.status.value,
+    "summary": lambda result: result.summary,
+    "issues_count": lambda result: len(result.issues),
+    "quality_score": lambda result: result.validation_result.quality_score if result.validation_result else None,
+    "created_at": lambda result: result.created_at.isoformat(),
+    "agent_results": agent_results_dict,
+    "validation": validation_dict,
+    "report_json": rendered_report
+}
+DEFAULT_RESULT_FIELDS = ("task_id", "status", "summary", "issues_count", "quality_score", "report_json")
+# С фильтрами или пагинацией проблем полный отчет по умолчанию не отдается
+DEFAULT_ISSUE_PAGE_FIELDS = ("task_id", "status", "summary", "issues_count", "quality_score", "issues")
+
+
 @app.get("/api/v1/review/{task_id}/results")
-async def get_review_results(task_id: UUID) -> Dict[str, Any]:
-    """Получение результатов анализа"""
+async def get_review_results(
+    task_id: UUID,
+    fields: Optional[str] = Query(None, description="Поля через запятую, например summary,issues"),
+    priority: Optional[List[Priority]] = Query(None),
+    agent: Optional[List[AgentType]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы проблем"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.issue_search_max_limit),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+) -> Response:
+    """Получение результатов анализа
     
-    result = results_storage.get(task_id)
+    fields выбирает поля ответа; issues - проблемы с фильтрами priority,
+    agent, category и страницами по limit (курсор next_cursor). Результат
+    неизменен: при совпадении If-None-Match отвечаем 304, не сериализуя отчет.
+    """
+    
+    paging = any(value is not None for value in (priority, agent, category, cursor, limit))
+    if fields:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+    else:
+        selected = list(DEFAULT_ISSUE_PAGE_FIELDS if paging else DEFAULT_RESULT_FIELDS)
+    unknown = set(selected) - set(RESULT_FIELDS) - {"issues"}
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    
+    result = await load_result(task_id)
     if not result:
         raise HTTPException(status_code=404, detail="Результаты не найдены")
     
-    return {
-        "task_id": str(task_id),
-        "status": result.status.value,
-        "summary": result.summary,
-        "issues_count": len(result.issues),
-        "quality_score": result.validation_result.quality_score if result.validation_result else None,
-        "report_json": result.report_json
-    }
+    # Разные выборки - разные представления результата
+    representation = "results"
+    if fields or paging:
+        query = repr((selected, priority, agent, category, cursor, limit))
+        representation = f"results-{hashlib.sha256(query.encode('utf-8')).hexdigest()[:12]}"
+    etag = result_etag(result, representation, accept)
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    content = {name: RESULT_FIELDS[name](result) for name in selected if name != "issues"}
+    if "issues" in selected:
+        try:
+            issues, next_cursor = select_issues(result.issues, priority, agent, category, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        content["issues"] = [issue_dict(issue) for issue in issues]
+        content["next_cursor"] = next_cursor
+    return immutable_response(content, etag, accept)
 
 
 @app.get("/api/v1/review/{task_id}/report")
-async def get_review_report(task_id: UUID, format: str = "markdown") -> Dict[str, Any]:
-    """Получение отчета"""
+async def get_review_report(
+    task_id: UUID,
+    format: str = "markdown",
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None)
+) -> Response:
+    """Получение отчета (с ETag, как и результаты)"""
     
-    result = results_storage.get(task_id)
+    if format not in ("markdown", "json"):
+        raise HTTPException(status_code=400, detail="Неподдерживаемый формат")
+    
+    result = await load_result(task_id)
     if not result:
         raise HTTPException(status_code=404, detail="Результаты не найдены")
     
-    if format == "markdown":
-        return {
-            "task_id": str(task_id),
-            "format": "markdown",
-            "report": result.report_markdown
-        }
-    elif format == "json":
-        return {
-            "task_id": str(task_id),
-            "format": "json",
-            "report": result.report_json
-        }
-    else:
+    etag = result_etag(result, f"report-{format}", accept)
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    return immutable_response({
+        "task_id": str(task_id),
+        "format": format,
+        "report": rendered_report(result, format)
+    }, etag, accept)
+
+
+# Потоковые форматы выгрузки отчета: тип содержимого и расширение файла
+DOWNLOAD_FORMATS = {
+    "markdown": ("text/markdown; charset=utf-8", "md"),
+    "ndjson": ("application/x-ndjson", "ndjson")
+}
+
+
+@app.get("/api/v1/review/{task_id}/report/download")
+async def download_review_report(
+    task_id: UUID,
+    format: str = "markdown",
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """Выгрузка отчета файлом: Markdown или NDJSON проблем
+    
+    Отчет строится из результата по частям и отправляется блоками, без сборки
+    всего документа в памяти.
+    """
+    
+    if format not in DOWNLOAD_FORMATS:
         raise HTTPException(status_code=400, detail="Неподдерживаемый формат")
+    
+    result = await load_result(task_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Результаты не найдены")
+    
+    etag = result_etag(result, f"download-{format}")
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    
+    media_type, extension = DOWNLOAD_FORMATS[format]
+    parts = iter_markdown(result) if format == "markdown" else iter_ndjson(result)
+    return StreamingResponse(
+        chunked(parts, settings.report_chunk_size),
+        media_type=media_type,
+        headers={
+            "ETag": etag,
+            "Cache-Control": settings.result_cache_control,
+            "Content-Disposition": f'attachment; filename="review-{task_id}.{extension}"'
+        }
+    )
 
 
 async def process_review(task_id: UUID):
@@ -171,59 +1235,221 @@ async def process_review(task_id: UUID):
     
     try:
         task = tasks_storage[task_id]
-        task.status = TaskStatus.IN_PROGRESS
-        logger.info(f"Starting review for task {task_id}")
-        
-        # 1. Директор анализирует задачу
-        director_instance = get_director()
-        logger.info("Director initialized, analyzing task...")
-        task_analysis = await director_instance.analyze_task(task)
-        
-        # 2. Директор создает стратегию
-        logger.info("Creating strategy...")
-        strategy = await director_instance.create_strategy(task, task_analysis)
-        
-        # 3. Запускаем агентов параллельно
-        logger.info(f"Starting {len(strategy.agents_to_use)} agents...")
-        agent_tasks = []
-        agent_results = {}
-        
-        for agent_type in strategy.agents_to_use:
-            agent = AgentFactory.create_agent(agent_type)
-            agent_tasks.append(agent.analyze(task, task.context))
+        if task.status == TaskStatus.CANCELLED:
+            return
         
-        # Ждем результаты всех агентов
-        results = await asyncio.gather(*agent_tasks)
+        # Задача с тем же документом и контекстом уже выполняется - подключаемся к ней
+        key = task.fingerprint() if settings.coalesce_identical_reviews else str(task_id)
+        leader_id = coalescer.leader(key)
+        if leader_id is not None:
+            logger.info(f"Task {task_id} attached to in-flight review {leader_id}")
+            await set_status([task], tasks_storage[leader_id].status)
+            progress.copy_history(leader_id, task_id)
         
-        for agent_type, result in zip(strategy.agents_to_use, results):
-            agent_results[agent_type] = result
-        
-        # 4. Критик валидирует результаты
-        logger.info("Validating results with critic...")
-        critic_instance = get_critic()
-        validation_result = await critic_instance.validate(agent_results)
-        
-        # 5. Синтезатор создает финальный отчет
-        logger.info("Synthesizing final report...")
-        synthesizer_instance = get_synthesizer()
-        review_result = await synthesizer_instance.synthesize(
-            str(task_id),
-            agent_results,
-            validation_result
+        # Ожидание в отдельной asyncio-задаче, чтобы его можно было отменить
+        pipeline = asyncio.create_task(
+            coalescer.run(key, task_id, lambda: review_in_slot(task, key))
         )
+        running_reviews[task_id] = pipeline
+        try:
+            review_result = await pipeline
+        finally:
+            running_reviews.pop(task_id, None)
+        
+        if review_result.task_id != task_id:
+            review_result = review_result.for_task(task_id)
         
         # Сохраняем результат
-        results_storage[task_id] = review_result
-        task.status = TaskStatus.COMPLETED
+        await save_result(task, review_result)
         logger.info(f"Review completed for task {task_id}")
         
+    except asyncio.CancelledError:
+        if tasks_storage[task_id].status != TaskStatus.CANCELLED:
+            raise
+        logger.info(f"Review cancelled for task {task_id}")
     except Exception as e:
         logger.error(f"Error processing review {task_id}: {e}", exc_info=True)
         if task_id in tasks_storage:
-            tasks_storage[task_id].status = TaskStatus.FAILED
+            try:
+                await set_status([tasks_storage[task_id]], TaskStatus.FAILED)
+                await notify_failure(tasks_storage[task_id])
+            except Exception as status_error:
+                logger.error(f"Failed to persist status of {task_id}: {status_error}")
         # Не пробрасываем исключение, чтобы не падал background task
 
 
+async def review_in_slot(task: ReviewTask, key: str) -> ReviewResult:
+    """Дождаться слота планировщика (полоса и квоты тенанта) и выполнить пайплайн"""
+    logger = logging.getLogger(__name__)
+    
+    async with get_scheduler().slot(task.user_email, task.lane):
+        await set_status(
+            [
+                tasks_storage[task_id] for task_id in coalescer.subscribers(key)
+                if task_id in tasks_storage and tasks_storage[task_id].status not in FINAL_STATUSES
+            ],
+            TaskStatus.IN_PROGRESS
+        )
+        logger.info(f"Starting review for task {task.id}")
+        
+        # События пайплайна получают все подписчики общего прогона;
+        # по смене этапов замеряется их длительность для оценки времени
+        timer = stage_latencies.timer()
+        
+        def emit(event: str, data: Dict[str, Any]):
+            if event == "stage":
+                timer.enter(data["stage"])
+            for task_id in coalescer.subscribers(key):
+                progress.publish(task_id, event, data)
+        
+        token = current_progress.set(emit)
+        try:
+            review_result = await run_pipeline(task)
+            timer.finish()
+            return review_result
+        finally:
+            current_progress.reset(token)
+
+
+async def process_batch(task_ids: List[UUID]):
+    """Обработка пакета: задачи конкурируют за слоты планировщика"""
+    await asyncio.gather(*(process_review(task_id) for task_id in task_ids))
+
+
+async def run_pipeline(task: ReviewTask) -> ReviewResult:
+    """Пайплайн анализа: Директор -> агенты -> Критик -> Синтезатор"""
+    logger = logging.getLogger(__name__)
+    deadline = asyncio.get_running_loop().time() + settings.analysis_timeout
+    
+    # 1. Директор анализирует задачу
+    director_instance = get_director()
+    logger.info("Director initialized, analyzing task...")
+    report_progress("stage", stage="director")
+    task_analysis = await director_instance.analyze_task(task)
+    
+    # 2. Директор создает стратегию
+    logger.info("Creating strategy...")
+    strategy = await director_instance.create_strategy(task, task_analysis)
+    
+    # 3. Запускаем агентов параллельно
+    logger.info(f"Starting {len(strategy.agents_to_use)} agents...")
+    report_progress("stage", stage="agents", agents=[agent_type.value for agent_type in strategy.agents_to_use])
+    agent_results = {}
+    
+    async def run_agent(agent_type: AgentType) -> AnalysisResult:
+        report_progress("agent", agent=agent_type.value, state="started")
+        result = await AgentFactory.create_agent(agent_type).analyze(task, task.context)
+        report_agent_result(result, "completed")
+        return result
+    
+    # Ждем результаты всех агентов; проблемы каждого уходят подписчикам сразу
+    results = await asyncio.gather(*(run_agent(agent_type) for agent_type in strategy.agents_to_use))
+    
+    for agent_type, result in zip(strategy.agents_to_use, results):
+        agent_results[agent_type] = result
+    
+    # 4. Критик валидирует результаты, агенты с замечаниями дорабатывают анализ
+    logger.info("Validating results with critic...")
+    validation_result = await refine_with_critic(task, agent_results, deadline)
+    
+    # 5. Синтезатор создает финальный отчет
+    logger.info("Synthesizing final report...")
+    report_progress("stage", stage="synthesizer")
+    synthesizer_instance = get_synthesizer()
+    return await synthesizer_instance.synthesize(
+        str(task.id),
+        agent_results,
+        validation_result
+    )
+
+
+async def refine_with_critic(
+    task: ReviewTask,
+    agent_results: Dict[AgentType, AnalysisResult],
+    deadline: float
+) -> ValidationResult:
+    """Цикл Критика: переспрашиваем только агентов с замечаниями, пока оценка
+    ниже порога, растет и не исчерпан бюджет задачи (раунды, токены, время).
+    
+    agent_results обновляется на месте принятыми доработками.
+    """
+    logger = logging.getLogger(__name__)
+    loop = asyncio.get_running_loop()
+    critic_instance = get_critic()
+    usage = current_usage.get()
+    
+    report_progress("stage", stage="critic")
+    validation_result = await critic_instance.validate(agent_results)
+    iterations = 1
+    report_critic_result(validation_result, iterations)
+    
+    while iterations < settings.max_iterations:
+        feedback = validation_result.agent_feedback
+        if validation_result.quality_score >= settings.quality_threshold or not feedback:
+            break
+        if usage is not None and usage.total >= settings.task_token_budget:
+            logger.info(f"Token budget exhausted for task {task.id}, stopping refinement")
+            break
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        
+        logger.info(f"Refinement round {iterations}: {', '.join(a.value for a in feedback)}")
+        report_progress("stage", stage="refinement", round=iterations, agents=[a.value for a in feedback])
+        try:
+            refined = await asyncio.wait_for(
+                asyncio.gather(*(
+                    AgentFactory.create_agent(agent_type).refine(task, task.context, notes)
+                    for agent_type, notes in feedback.items()
+                )),
+                timeout=remaining
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Time budget exhausted for task {task.id} during refinement")
+            break
+        
+        candidate = {**agent_results, **dict(zip(feedback, refined))}
+        new_validation = await critic_instance.validate(candidate)
+        iterations += 1
+        report_critic_result(new_validation, iterations)
+        improvement = new_validation.quality_score - validation_result.quality_score
+        if improvement < 0:
+            # Доработка ухудшила результат - оставляем предыдущий
+            break
+        
+        agent_results.update(candidate)
+        for agent_type in feedback:
+            report_agent_result(candidate[agent_type], "refined")
+        validation_result = new_validation
+        if improvement < settings.refinement_min_improvement:
+            break
+    
+    validation_result.iterations = iterations
+    return validation_result
+
+
+def report_agent_result(result: AnalysisResult, state: str):
+    """Событие с проблемами, найденными агентом"""
+    report_progress(
+        "agent",
+        agent=result.agent.value,
+        state=state,
+        confidence=result.confidence,
+        issues=[issue.model_dump(mode="json") for issue in result.issues]
+    )
+
+
+def report_critic_result(validation_result: ValidationResult, round: int):
+    """Событие с оценкой Критика"""
+    report_progress(
+        "critic",
+        round=round,
+        quality_score=validation_result.quality_score,
+        is_valid=validation_result.is_valid,
+        agents_to_refine=[agent_type.value for agent_type in validation_result.agent_feedback]
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,46 @@
+"""Классы ответов API: JSON через orjson и msgpack по заголовку Accept"""
+from importlib.util import find_spec
+from typing import Any, Dict, Optional
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# msgpack необязателен - без него клиенты получают JSON
+MSGPACK_AVAILABLE = find_spec("msgpack") is not None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON через orjson: UUID и datetime сериализуются без промежуточного кодировщика"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgPackResponse(Response):
+    """Ответ в msgpack"""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        import msgpack
+        return msgpack.packb(content, use_bin_type=True, default=str)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Просит ли клиент msgpack"""
+    if not accept or not MSGPACK_AVAILABLE:
+        return False
+    return any(part.split(";")[0].strip() in MSGPACK_MEDIA_TYPES for part in accept.split(","))
+
+
+def negotiated_response(
+    content: Any,
+    accept: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """msgpack, если клиент его просит, иначе JSON (orjson)"""
+    headers = {**(headers or {}), "Vary": "Accept"}
+    if wants_msgpack(accept):
+        return MsgPackResponse(content, headers=headers)
+    return ORJSONResponse(content, headers=headers)
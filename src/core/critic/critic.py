@@ -1,7 +1,7 @@
 """Критик - валидация выводов, оценка рисков"""
 from typing import List, Dict, Any
 from src.models import (
-    ValidationResult, AnalysisResult, Issue, Priority, AgentType
+    ValidationResult, AnalysisResult, Issue, Priority, AgentType, TaskStatus
 )
 from src.utils.ai_client import AIClient
 
@@ -48,7 +48,8 @@ class Critic:
             criticality_assessment=criticality,
             recommendations=self._generate_recommendations(
                 logical_errors, missed_issues, conflicts
-            )
+            ),
+            agent_feedback=self._collect_agent_feedback(agent_results, missed_issues)
         )
     
     async def _check_logic(self, issues: List[Issue]) -> List[str]:
@@ -148,6 +149,33 @@ class Critic:
         
         return max(0.0, min(1.0, base_score))
     
+    def _collect_agent_feedback(
+        self,
+        agent_results: Dict[AgentType, AnalysisResult],
+        missed_issues: List[Issue]
+    ) -> Dict[AgentType, List[str]]:
+        """Замечания по агентам, анализ которых стоит доработать"""
+        feedback: Dict[AgentType, List[str]] = {}
+        
+        for agent, result in agent_results.items():
+            if result.status != TaskStatus.COMPLETED:
+                feedback.setdefault(agent, []).append("Анализ не завершен")
+            
+            seen_titles = set()
+            for issue in result.issues:
+                if issue.title in seen_titles:
+                    feedback.setdefault(agent, []).append(f"Дубликат проблемы: {issue.title}")
+                seen_titles.add(issue.title)
+        
+        # Пропущенные проблемы адресуем агенту их профиля
+        for issue in missed_issues:
+            if issue.agent in agent_results:
+                feedback.setdefault(issue.agent, []).append(
+                    f"Возможно пропущено: {issue.title}. {issue.description}"
+                )
+        
+        return feedback
+    
     def _generate_recommendations(
         self,
         logical_errors: List[str],
@@ -0,0 +1,4 @@
+"""Планировщик - очередь задач с приоритетами и квотами тенантов"""
+from .scheduler import Scheduler
+
+__all__ = ["Scheduler"]
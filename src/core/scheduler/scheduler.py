@@ -0,0 +1,203 @@
+"""Планировщик - приоритетные полосы и справедливая очередь между тенантами"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from src.config import settings
+from src.models import TaskLane
+from src.utils.token_usage import TokenUsage, current_usage
+
+DEFAULT_TENANT = "anonymous"
+
+
+class _Waiter:
+    """Задача, ожидающая слот"""
+
+    __slots__ = ("tenant", "lane", "finish_tag", "future")
+
+    def __init__(self, tenant: str, lane: TaskLane, finish_tag: float, future: asyncio.Future):
+        self.tenant = tenant
+        self.lane = lane
+        self.finish_tag = finish_tag
+        self.future = future
+
+
+class Scheduler:
+    """Планировщик пайплайнов анализа
+
+    Каждая пара (тенант, полоса) - отдельный поток со своей очередью.
+    Слот получает голова потока с наименьшей виртуальной меткой завершения
+    (weighted fair queuing), вес потока - произведение веса полосы и веса
+    тенанта. Тенанты, упершиеся в лимит параллельности или токенов,
+    пропускаются, пока ресурс не освободится.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        tenant_max_concurrent: Optional[int] = None,
+        tenant_token_quota: Optional[int] = None,
+        tenant_token_window: Optional[int] = None,
+        lane_weights: Optional[Dict[TaskLane, float]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None
+    ):
+        self.max_concurrent = max_concurrent or settings.scheduler_max_concurrent
+        self.tenant_max_concurrent = tenant_max_concurrent or settings.tenant_max_concurrent
+        self.tenant_token_quota = tenant_token_quota or settings.tenant_token_quota
+        self.tenant_token_window = tenant_token_window or settings.tenant_token_window
+        self.lane_weights = lane_weights or {
+            TaskLane.INTERACTIVE: settings.interactive_lane_weight,
+            TaskLane.BATCH: settings.batch_lane_weight
+        }
+        self.tenant_weights = tenant_weights if tenant_weights is not None else dict(settings.tenant_weights)
+
+        self._flows: Dict[Tuple[str, TaskLane], Deque[_Waiter]] = {}
+        self._last_finish: Dict[Tuple[str, TaskLane], float] = {}
+        self._virtual_time = 0.0
+        self._active = 0
+        self._running: Dict[str, int] = {}
+        self._token_log: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        tenant: Optional[str] = None,
+        lane: TaskLane = TaskLane.INTERACTIVE
+    ) -> AsyncIterator[TokenUsage]:
+        """Дождаться слота и выполнить блок, учитывая потраченные токены"""
+        tenant = tenant or DEFAULT_TENANT
+        waiter = self._enqueue(tenant, lane)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Слот уже выдан, но задачу отменили до старта
+                self._release(tenant, 0)
+            else:
+                self._dispatch()
+            raise
+
+        usage = TokenUsage()
+        token = current_usage.set(usage)
+        try:
+            yield usage
+        finally:
+            current_usage.reset(token)
+            self._release(tenant, usage.total)
+
+    def tokens_used(self, tenant: str, now: Optional[float] = None) -> int:
+        """Токены, потраченные тенантом в текущем окне"""
+        log = self._token_log.get(tenant)
+        if not log:
+            return 0
+        now = now if now is not None else time.monotonic()
+        while log and log[0][0] <= now - self.tenant_token_window:
+            log.popleft()
+        if not log:
+            del self._token_log[tenant]
+            return 0
+        return sum(tokens for _, tokens in log)
+
+    @property
+    def active(self) -> int:
+        """Выполняющихся пайплайнов"""
+        return self._active
+
+    def queued(self) -> int:
+        """Задач, ожидающих слот (все полосы)"""
+        return sum(1 for queue in self._flows.values() for waiter in queue if not waiter.future.done())
+
+    def stats(self) -> Dict[str, Any]:
+        """Текущее состояние очереди"""
+        queued = {lane.value: 0 for lane in TaskLane}
+        for (_, lane), queue in self._flows.items():
+            queued[lane.value] += sum(1 for w in queue if not w.future.done())
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queued": queued,
+            "running_by_tenant": dict(self._running)
+        }
+
+    def _enqueue(self, tenant: str, lane: TaskLane) -> _Waiter:
+        """Поставить задачу в очередь ее потока"""
+        key = (tenant, lane)
+        weight = self.lane_weights.get(lane, 1.0) * self.tenant_weights.get(tenant, 1.0)
+        start_tag = max(self._virtual_time, self._last_finish.get(key, 0.0))
+        finish_tag = start_tag + 1.0 / weight
+        self._last_finish[key] = finish_tag
+
+        waiter = _Waiter(tenant, lane, finish_tag, asyncio.get_running_loop().create_future())
+        self._flows.setdefault(key, deque()).append(waiter)
+        self._dispatch()
+        return waiter
+
+    def _release(self, tenant: str, tokens: int):
+        """Освободить слот и списать токены с квоты тенанта"""
+        self._active -= 1
+        self._running[tenant] -= 1
+        if self._running[tenant] <= 0:
+            del self._running[tenant]
+        if tokens:
+            self._token_log.setdefault(tenant, deque()).append((time.monotonic(), tokens))
+        self._dispatch()
+
+    def _dispatch(self):
+        """Выдать свободные слоты ожидающим задачам"""
+        while self._active < self.max_concurrent:
+            waiter = self._pick()
+            if waiter is None:
+                break
+            self._flows[(waiter.tenant, waiter.lane)].popleft()
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag)
+            self._active += 1
+            self._running[waiter.tenant] = self._running.get(waiter.tenant, 0) + 1
+            waiter.future.set_result(None)
+        self._schedule_wakeup()
+
+    def _pick(self) -> Optional[_Waiter]:
+        """Выбрать голову потока с минимальной меткой среди допустимых тенантов"""
+        now = time.monotonic()
+        best = None
+        for key, queue in list(self._flows.items()):
+            # Отмененные ожидания просто выбрасываем
+            while queue and queue[0].future.done():
+                queue.popleft()
+            if not queue:
+                del self._flows[key]
+                if self._last_finish.get(key, 0.0) <= self._virtual_time:
+                    self._last_finish.pop(key, None)
+                continue
+            head = queue[0]
+            if not self._is_eligible(head.tenant, now):
+                continue
+            if best is None or head.finish_tag < best.finish_tag:
+                best = head
+        return best
+
+    def _is_eligible(self, tenant: str, now: float) -> bool:
+        """Тенант не исчерпал лимиты параллельности и токенов"""
+        if self._running.get(tenant, 0) >= self.tenant_max_concurrent:
+            return False
+        return self.tokens_used(tenant, now) < self.tenant_token_quota
+
+    def _schedule_wakeup(self):
+        """Перепланировать диспетчеризацию на момент освобождения квоты токенов"""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        if self._active >= self.max_concurrent or not self._flows:
+            return
+
+        now = time.monotonic()
+        waiting_tenants = {tenant for tenant, _ in self._flows}
+        expiries = [
+            self._token_log[tenant][0][0] + self.tenant_token_window - now
+            for tenant in waiting_tenants
+            if self._token_log.get(tenant) and self.tokens_used(tenant, now) >= self.tenant_token_quota
+        ]
+        if expiries:
+            delay = max(0.0, min(expiries))
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
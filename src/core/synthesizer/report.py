@@ -0,0 +1,190 @@
+"""Представления отчета (Markdown и JSON), строящиеся из результата по запросу"""
+import base64
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.models import AgentType, Issue, ReviewResult, ValidationResult, Priority
+
+PRIORITY_ORDER = [Priority.CRITICAL, Priority.HIGH, Priority.MEDIUM, Priority.LOW, Priority.INFO]
+
+
+def render_markdown(result: ReviewResult) -> str:
+    """Генерация Markdown отчета"""
+    return "".join(iter_markdown(result))
+
+
+def iter_markdown(result: ReviewResult) -> Iterator[str]:
+    """Markdown отчет по частям - для потоковой выгрузки без сборки всей строки"""
+    issues = result.issues
+    validation_result = result.validation_result or ValidationResult(is_valid=True, quality_score=0.0)
+
+    report = f"""# Отчет анализа документации
+
+## Executive Summary
+
+{validation_result.recommendations[0] if validation_result.recommendations else "Анализ завершен"}
+
+**Оценка качества**: {validation_result.quality_score:.2%}
+**Всего проблем**: {len(issues)}
+**Критических**: {len([i for i in issues if i.priority == Priority.CRITICAL])}
+
+## Выявленные проблемы
+
+"""
+
+    # Группируем по приоритетам
+    by_priority = {}
+    for issue in issues:
+        if issue.priority not in by_priority:
+            by_priority[issue.priority] = []
+        by_priority[issue.priority].append(issue)
+
+    yield report
+    for priority in PRIORITY_ORDER:
+        if priority in by_priority:
+            yield f"\n### {priority.value.upper()}\n\n"
+            for issue in by_priority[priority]:
+                yield (
+                    f"#### {issue.title}\n\n"
+                    f"**Агент**: {issue.agent.value}\n\n"
+                    f"**Описание**: {issue.description}\n\n"
+                    f"**Рекомендация**: {issue.recommendation}\n\n"
+                )
+                if issue.location:
+                    yield f"**Местоположение**: {issue.location}\n\n"
+                yield "---\n\n"
+
+    # Добавляем результаты по агентам
+    yield "\n## Результаты по агентам\n\n"
+    for agent, summary in result.agent_summaries.items():
+        yield (
+            f"### {agent.value}\n\n"
+            f"**Статус**: {summary.status.value}\n\n"
+            f"**Найдено проблем**: {summary.issues_count}\n\n"
+            f"**Уверенность**: {summary.confidence:.2%}\n\n"
+            f"**Резюме**: {summary.summary}\n\n"
+        )
+
+
+def iter_ndjson(result: ReviewResult) -> Iterator[str]:
+    """Проблемы отчета построчно в NDJSON (поля как в report_json)"""
+    for issue in result.issues:
+        yield json.dumps(issue_dict(issue), ensure_ascii=False) + "\n"
+
+
+def chunked(parts: Iterable[str], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Склеить мелкие части в блоки около chunk_size байт для отправки"""
+    buffer, size = [], 0
+    for part in parts:
+        data = part.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def issue_dict(issue: Issue) -> Dict[str, Any]:
+    """Проблема в JSON отчете"""
+    return {
+        "id": str(issue.id),
+        "agent": issue.agent.value,
+        "priority": issue.priority.value,
+        "title": issue.title,
+        "description": issue.description,
+        "recommendation": issue.recommendation,
+        "category": issue.category,
+        "location": issue.location
+    }
+
+
+def render_json(result: ReviewResult) -> Dict[str, Any]:
+    """Генерация JSON отчета"""
+    issues = result.issues
+    validation_result = result.validation_result or ValidationResult(is_valid=True, quality_score=0.0)
+    return {
+        "summary": {
+            "total_issues": len(issues),
+            "critical": len([i for i in issues if i.priority == Priority.CRITICAL]),
+            "high": len([i for i in issues if i.priority == Priority.HIGH]),
+            "medium": len([i for i in issues if i.priority == Priority.MEDIUM]),
+            "low": len([i for i in issues if i.priority == Priority.LOW]),
+            "quality_score": validation_result.quality_score
+        },
+        "issues": [issue_dict(issue) for issue in issues],
+        "agent_results": agent_results_dict(result),
+        "validation": validation_dict(result)
+    }
+
+
+def agent_results_dict(result: ReviewResult) -> Dict[str, Any]:
+    """Блок результатов по агентам JSON отчета"""
+    return {
+        agent.value: {
+            "status": summary.status.value,
+            "issues_count": summary.issues_count,
+            "confidence": summary.confidence,
+            "summary": summary.summary
+        }
+        for agent, summary in result.agent_summaries.items()
+    }
+
+
+def validation_dict(result: ReviewResult) -> Dict[str, Any]:
+    """Блок валидации JSON отчета"""
+    validation_result = result.validation_result or ValidationResult(is_valid=True, quality_score=0.0)
+    return {
+        "is_valid": validation_result.is_valid,
+        "quality_score": validation_result.quality_score,
+        "missed_issues_count": len(validation_result.missed_issues),
+        "conflicts_count": len(validation_result.conflicts),
+        "recommendations": validation_result.recommendations,
+        "iterations": validation_result.iterations
+    }
+
+
+def select_issues(
+    issues: List[Issue],
+    priorities: Optional[Iterable[Priority]] = None,
+    agents: Optional[Iterable[AgentType]] = None,
+    categories: Optional[Iterable[str]] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[Issue], Optional[str]]:
+    """Страница проблем результата с фильтрами; курсор - позиция в неизменном списке
+
+    Возвращает проблемы страницы и курсор следующей (None - страниц больше нет).
+    """
+    priorities = set(priorities) if priorities else None
+    agents = set(agents) if agents else None
+    categories = set(categories) if categories else None
+    page = []
+    for position in range(decode_issue_cursor(cursor) if cursor else 0, len(issues)):
+        issue = issues[position]
+        if priorities is not None and issue.priority not in priorities:
+            continue
+        if agents is not None and issue.agent not in agents:
+            continue
+        if categories is not None and issue.category not in categories:
+            continue
+        if limit is not None and len(page) == limit:
+            return page, encode_issue_cursor(position)
+        page.append(issue)
+    return page, None
+
+
+def encode_issue_cursor(position: int) -> str:
+    """Непрозрачный курсор страницы проблем"""
+    return base64.urlsafe_b64encode(f"issue:{position}".encode("ascii")).decode("ascii")
+
+
+def decode_issue_cursor(cursor: str) -> int:
+    """Позиция из курсора; ValueError для чужого или поврежденного курсора"""
+    try:
+        prefix, position = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+        if prefix != "issue" or int(position) < 0:
+            raise ValueError
+        return int(position)
+    except Exception:
+        raise ValueError("Некорректный курсор")
@@ -1,14 +1,27 @@
 """Модуль работы с базой данных"""
 from .base import Base
-from .session import SessionLocal, engine
 from .models import ReviewTaskDB, ReviewResultDB, IssueDB
+from .storage import StorageBackend, create_storage_backend
+from .repository import ReviewRepository
 
 __all__ = [
     "Base",
     "SessionLocal",
     "engine",
+    "AsyncSessionLocal",
+    "async_engine",
     "ReviewTaskDB",
     "ReviewResultDB",
-    "IssueDB"
+    "IssueDB",
+    "StorageBackend",
+    "create_storage_backend",
+    "ReviewRepository"
 ]
 
+
+def __getattr__(name: str):
+    # Движки и фабрики сессий создаются при первом обращении (см. session.py)
+    if name in ("SessionLocal", "engine", "AsyncSessionLocal", "async_engine"):
+        from . import session
+        return getattr(session, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,153 @@
+"""Холодный архив проблем и результатов в сжатых Parquet-файлах
+
+Раскладка: <root>/<kind>/month=YYYY-MM/part-<uuid>.parquet, где kind -
+issues или review_results. Архив читается поиском и get_result наравне
+с горячими таблицами. Тексты шаблонов проблем хранятся в каждой строке -
+повторы сжимает словарное кодирование Parquet.
+"""
+import json
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.db.models import IssueDB, IssueTemplateDB, ReviewResultDB, issue_template_id
+
+ISSUES_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("task_id", pa.string()),
+    ("agent", pa.string()),
+    ("priority", pa.string()),
+    ("title", pa.string()),
+    ("description", pa.string()),
+    ("recommendation", pa.string()),
+    ("category", pa.string()),
+    ("location", pa.string()),
+    ("issue_metadata", pa.string()),
+    ("user_email", pa.string()),
+    ("created_at", pa.timestamp("us"))
+])
+
+RESULTS_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("task_id", pa.string()),
+    ("status", pa.string()),
+    ("summary", pa.string()),
+    ("payload", pa.binary()),
+    ("quality_score", pa.float64()),
+    ("created_at", pa.timestamp("us"))
+])
+
+# Поля, которые в Parquet хранятся строкой
+_UUID_FIELDS = ("id", "task_id")
+_JSON_FIELDS = ("issue_metadata",)
+
+
+class ParquetArchive:
+    """Архив по месяцам: запись выгруженных секций и чтение с фильтрами"""
+
+    def __init__(self, root: str, compression: str = "zstd"):
+        self.root = Path(root)
+        self.compression = compression
+
+    def write_issues(self, month: date, rows: List[IssueDB]):
+        """Записать проблемы месяца"""
+        self._write("issues", month, ISSUES_SCHEMA, rows)
+
+    def write_results(self, month: date, rows: List[ReviewResultDB]):
+        """Записать результаты месяца"""
+        self._write("review_results", month, RESULTS_SCHEMA, rows)
+
+    def months(self, kind: str) -> List[date]:
+        """Архивные месяцы, новые первыми"""
+        directory = self.root / kind
+        if not directory.exists():
+            return []
+        months = [
+            datetime.strptime(path.name[len("month="):], "%Y-%m").date()
+            for path in directory.glob("month=*") if path.is_dir()
+        ]
+        return sorted(months, reverse=True)
+
+    def iter_issues(
+        self,
+        filters: Optional[List[tuple]] = None,
+        predicate: Optional[Callable[[IssueDB], bool]] = None,
+        months: Optional[List[date]] = None
+    ) -> Iterator[IssueDB]:
+        """Проблемы архива от новых к старым (filters - в формате pyarrow, predicate - остальное)"""
+        for month in months if months is not None else self.months("issues"):
+            rows = [
+                self._issue_from_record(record)
+                for record in self._read("issues", month, filters)
+            ]
+            rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+            for row in rows:
+                if predicate is None or predicate(row):
+                    yield row
+
+    def find_result(self, task_id: UUID) -> Optional[ReviewResultDB]:
+        """Результат задачи из архива"""
+        for month in self.months("review_results"):
+            records = self._read("review_results", month, [("task_id", "=", str(task_id))])
+            if records:
+                return ReviewResultDB(**self._from_record(records[0]))
+        return None
+
+    def find_issues(self, task_id: UUID) -> List[IssueDB]:
+        """Проблемы задачи из архива"""
+        return list(self.iter_issues(filters=[("task_id", "=", str(task_id))]))
+
+    def _write(self, kind: str, month: date, schema: pa.Schema, rows: List[Any]):
+        if not rows:
+            return
+        directory = self.root / kind / f"month={month:%Y-%m}"
+        directory.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pylist([self._to_record(row, schema) for row in rows], schema=schema)
+        # Пишем во временный файл и переименовываем, чтобы читатели не видели половину файла
+        path = directory / f"part-{uuid.uuid4().hex}.parquet"
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path, compression=self.compression)
+        tmp_path.rename(path)
+
+    def _read(self, kind: str, month: date, filters: Optional[List[tuple]]) -> List[Dict[str, Any]]:
+        records = []
+        for path in sorted((self.root / kind / f"month={month:%Y-%m}").glob("part-*.parquet")):
+            records.extend(pq.read_table(path, filters=filters or None).to_pylist())
+        return records
+
+    @staticmethod
+    def _to_record(row: Any, schema: pa.Schema) -> Dict[str, Any]:
+        record = {}
+        for name in schema.names:
+            value = getattr(row, name)
+            if name in _UUID_FIELDS:
+                value = str(value)
+            elif name in _JSON_FIELDS:
+                value = json.dumps(value, ensure_ascii=False)
+            record[name] = value
+        return record
+
+    def _issue_from_record(self, record: Dict[str, Any]) -> IssueDB:
+        """Проблема из записи архива; тексты в архиве хранятся в каждой строке"""
+        record = self._from_record(record)
+        texts = [record.pop(name) for name in ("title", "description", "recommendation")]
+        template_id = issue_template_id(*texts)
+        return IssueDB(
+            **record,
+            template_id=template_id,
+            template=IssueTemplateDB(
+                id=template_id, title=texts[0], description=texts[1], recommendation=texts[2]
+            )
+        )
+
+    @staticmethod
+    def _from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        for name in _UUID_FIELDS:
+            record[name] = UUID(record[name])
+        for name in _JSON_FIELDS:
+            if name in record:
+                record[name] = json.loads(record[name]) if record[name] else {}
+        return record
@@ -1,11 +1,28 @@
 """SQLAlchemy модели для базы данных"""
-from sqlalchemy import Column, String, DateTime, Text, JSON, Integer, Float, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, Date, DateTime, Text, JSON, Integer, Float, Boolean, Enum as SQLEnum, Index, ForeignKey, LargeBinary, func, literal_column
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
 from datetime import datetime
+import hashlib
+import json
 import uuid
+from src.config import settings
 from src.db.base import Base
 
 
+def issue_search_vector(title, description):
+    """tsvector по заголовку и описанию проблемы (PostgreSQL)"""
+    # Только литералы: в выражении индекса нет параметров, а запрос должен
+    # совпадать с ним текстуально, чтобы планировщик выбрал GIN-индекс
+    empty = literal_column("''")
+    return func.to_tsvector(
+        literal_column(f"'{settings.search_text_config}'::regconfig"),
+        func.coalesce(title, empty).concat(literal_column("' '")).concat(
+            func.coalesce(description, empty)
+        )
+    )
+
+
 class ReviewTaskDB(Base):
     """SQLAlchemy модель для ReviewTask"""
     __tablename__ = "review_tasks"
@@ -14,12 +31,61 @@ class ReviewTaskDB(Base):
     document = Column(Text, nullable=False)
     document_type = Column(String(50), default="markdown")
     context = Column(JSON, default=dict)
-    status = Column(String(20), default="pending")  # pending, in_progress, completed, failed
+    status = Column(String(20), default="pending")  # pending, in_progress, completed, failed, cancelled
+    lane = Column(String(20), default="interactive")  # interactive, batch
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Пример нового поля для проверки работы
     user_email = Column(String(255), nullable=True, index=True)  # Email пользователя
+    callback_url = Column(String(2048), nullable=True)  # Уведомление о завершении
+
+
+class ReviewBatchDB(Base):
+    """Пакет задач: состав и общий контекст (задачи пакета - в review_tasks)"""
+    __tablename__ = "review_batches"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    task_ids = Column(JSON, nullable=False)  # Порядок документов пакета
+    context = Column(JSON, default=dict)
+    user_email = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+def issue_template_id(title: str, description: str, recommendation: str) -> str:
+    """Идентификатор шаблона - хэш его текста, одинаковые тексты дают один шаблон"""
+    payload = json.dumps([title, description, recommendation], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IssueTemplateDB(Base):
+    """Текст проблемы (заголовок, описание, рекомендация), общий для всех ее вхождений
+
+    Агенты выдают одни и те же типовые проблемы постоянно, поэтому issues
+    ссылаются на шаблон, а не хранят длинные тексты в каждой строке.
+    """
+    __tablename__ = "issue_templates"
+    
+    id = Column(String(64), primary_key=True)
+    title = Column(String(500), nullable=False)
+    description = Column(Text, nullable=False)
+    recommendation = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Полнотекстовый поиск - только в PostgreSQL. Индекс объявлен здесь, а не
+        # отдельно: по выражению с литералами SQLAlchemy не находит таблицу сам
+        Index(
+            "ix_issue_templates_search_vector",
+            issue_search_vector(title, description),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# Горячие таблицы issues и review_results в PostgreSQL секционированы по месяцам
+# created_at (секции создает src.db.partitions); ключ секционирования входит в PK.
+MONTHLY_PARTITIONS = {"postgresql_partition_by": "RANGE (created_at)"}
 
 
 class IssueDB(Base):
@@ -30,25 +96,90 @@ class IssueDB(Base):
     task_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     agent = Column(String(50), nullable=False)  # analyst, architect, devsecops, devops_sre
     priority = Column(String(20), nullable=False)  # critical, high, medium, low, info
-    title = Column(String(500), nullable=False)
-    description = Column(Text, nullable=False)
-    recommendation = Column(Text, nullable=False)
+    template_id = Column(String(64), ForeignKey("issue_templates.id"), nullable=False)
     category = Column(String(100), nullable=False)
     location = Column(String(500), nullable=True)
     issue_metadata = Column(JSON, default=dict)  # Переименовано из metadata, т.к. metadata зарезервировано в SQLAlchemy
-    created_at = Column(DateTime, default=datetime.utcnow)
+    user_email = Column(String(255), nullable=True)  # Тенант задачи (денормализовано для поиска)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    __table_args__ = MONTHLY_PARTITIONS
+    
+    # Шаблон загружается вместе с проблемой; один шаблон - один объект на сессию
+    template = relationship(IssueTemplateDB, lazy="joined", innerjoin=True)
+    
+    @property
+    def title(self) -> str:
+        return self.template.title
+    
+    @property
+    def description(self) -> str:
+        return self.template.description
+    
+    @property
+    def recommendation(self) -> str:
+        return self.template.recommendation
+
+
+# Индексы поиска проблем: фильтры + сортировка (created_at, id) для keyset-пагинации
+Index(
+    "ix_issues_priority_category_agent_created",
+    IssueDB.priority, IssueDB.category, IssueDB.agent, IssueDB.created_at, IssueDB.id
+)
+Index("ix_issues_created", IssueDB.created_at, IssueDB.id)
+Index("ix_issues_user_created", IssueDB.user_email, IssueDB.created_at, IssueDB.id)
 
 
 class ReviewResultDB(Base):
     """SQLAlchemy модель для ReviewResult"""
     __tablename__ = "review_results"
+    __table_args__ = MONTHLY_PARTITIONS
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    task_id = Column(UUID(as_uuid=True), nullable=False, unique=True, index=True)
+    # Уникальность по task_id в секционированной таблице не проверяется (результат пишется один раз)
+    task_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     status = Column(String(20), nullable=False)
     summary = Column(Text, nullable=False)
-    report_markdown = Column(Text, nullable=False)
-    report_json = Column(JSON, nullable=False)
+    # Результат без проблем (они в issues) - сжатый JSON; отчеты строятся из него по запросу
+    payload = Column(LargeBinary, nullable=False)
     quality_score = Column(Float, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
+
+class IssueDailyStatsDB(Base):
+    """Счетчики проблем за день по категории, агенту и приоритету
+
+    Обновляются инкрементально в транзакции сохранения результата, поэтому
+    статистика читается без сканирования issues.
+    """
+    __tablename__ = "issue_daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    agent = Column(String(50), primary_key=True)
+    priority = Column(String(20), primary_key=True)
+    issue_count = Column(Integer, nullable=False, default=0)
+
+
+class WebhookOutboxDB(Base):
+    """Исходящая очередь уведомлений о завершении анализа
+
+    Уведомление пишется в одной транзакции с результатом, а доставляется
+    отдельным фоновым обработчиком с повторами, поэтому не теряется при
+    перезапуске и не задерживает пайплайн.
+    """
+    __tablename__ = "webhook_outbox"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    task_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    url = Column(String(2048), nullable=False)
+    event = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, delivered, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+    
+    # Выборка готовых к отправке: status = pending и next_attempt_at <= now
+    __table_args__ = (Index("ix_webhook_outbox_due", "status", "next_attempt_at"),)
@@ -0,0 +1,82 @@
+"""Месячные секции горячих таблиц PostgreSQL"""
+from datetime import date, datetime
+from typing import Iterator, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Таблицы, секционированные по created_at
+PARTITIONED_TABLES = ("issues", "review_results")
+
+
+def month_start(value: date) -> date:
+    """Первый день месяца"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Первый день месяца, отстоящего на months"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(month: date) -> Tuple[datetime, datetime]:
+    """Границы месяца [начало, начало следующего)"""
+    start = month_start(month)
+    return datetime.combine(start, datetime.min.time()), datetime.combine(add_months(start, 1), datetime.min.time())
+
+
+def iter_months(first: date, stop: date) -> Iterator[date]:
+    """Месяцы от first до stop (не включая)"""
+    month = month_start(first)
+    while month < stop:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Имя секции таблицы за месяц"""
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+# Ключ pg_advisory_xact_lock: воркеры не создают секции одновременно
+PARTITION_LOCK_KEY = 0x646F6372
+
+
+async def ensure_partitions(connection: AsyncConnection, first: date, months: int):
+    """Создать секции на months месяцев начиная с first и секцию по умолчанию
+
+    Вызывается при старте, периодически и при каждой архивации, чтобы
+    секции появлялись до того, как их строки попадут в DEFAULT. Если
+    строки месяца уже лежат в DEFAULT (обслуживание не запускалось),
+    секция создается отдельной таблицей, строки переносятся в нее и она
+    подключается к родителю - PostgreSQL не дает создать секцию поверх них.
+    """
+    await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    for table in PARTITIONED_TABLES:
+        default = f"{table}_default"
+        await connection.execute(text(f"CREATE TABLE IF NOT EXISTS {default} PARTITION OF {table} DEFAULT"))
+        for month in iter_months(first, add_months(first, months)):
+            name = partition_name(table, month)
+            if (await connection.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar():
+                continue
+            start, end = month_range(month)
+            bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+            stranded = (await connection.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})")
+            )).scalar()
+            if not stranded:
+                await connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+                continue
+            # Индексы и ограничения родителя ATTACH создаст сам
+            await connection.execute(text(
+                f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            await connection.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}"))
+            await connection.execute(text(f"DELETE FROM {default} WHERE {in_range}"))
+            await connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+
+async def drop_partition(connection: AsyncConnection, table: str, month: date):
+    """Удалить секцию месяца (данные должны быть уже выгружены)"""
+    await connection.execute(text(f"DROP TABLE IF EXISTS {partition_name(table, month)}"))
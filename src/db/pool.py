@@ -0,0 +1,46 @@
+"""Пул соединений SQLAlchemy с метриками"""
+import logging
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.config import settings
+from src.utils.pool_metrics import PoolMetrics
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, который считает ожидание и переполнение"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        overflow = self.overflow()
+        with self.metrics.waiting():
+            connection = super()._do_get()
+        self.metrics.record_checkout(overflow=self.overflow() > max(overflow, 0))
+        return connection
+
+    def stats(self) -> dict:
+        """Текущее состояние пула и накопленные метрики"""
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **self.metrics.stats()
+        }
+
+
+# Логгер пула назван по модулю класса; как у пулов SQLAlchemy - только предупреждения
+logging.getLogger(f"{__name__}.{InstrumentedAsyncQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+def pool_options() -> dict:
+    """Параметры пула для create_async_engine из настроек"""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle
+    }
@@ -0,0 +1,692 @@
+"""Репозиторий задач, проблем и результатов анализа"""
+import asyncio
+import base64
+import json
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from src.models import (
+    ReviewTask, ReviewBatch, ReviewResult, Issue, TaskStatus, TaskLane, AgentType, Priority,
+    IssueSearchHit, IssueSearchPage, IssueStatsBucket, ResultSummary, WebhookDelivery, WebhookStatus
+)
+from src.config import settings
+from src.db.base import Base
+from src.db.models import (
+    ReviewTaskDB, ReviewBatchDB, IssueDB, IssueTemplateDB, ReviewResultDB, IssueDailyStatsDB, WebhookOutboxDB,
+    issue_search_vector, issue_template_id
+)
+from src.db.partitions import (
+    PARTITIONED_TABLES, add_months, ensure_partitions, drop_partition, iter_months, month_range, month_start
+)
+from src.db.storage import StorageBackend
+
+if TYPE_CHECKING:
+    from src.db.archive import ParquetArchive
+
+# Операция записи, выполняемая внутри транзакции
+WriteOp = Callable[[AsyncSession], Awaitable[None]]
+
+# Измерения сводной статистики проблем
+ISSUE_STATS_DIMENSIONS = ("day", "category", "agent", "priority")
+
+
+class ReviewRepository(StorageBackend):
+    """Асинхронное хранение задач, проблем и результатов в SQL БД (PostgreSQL)"""
+
+    def __init__(self, engine: AsyncEngine, archive: Optional["ParquetArchive"] = None):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        # Холодный архив старых месяцев (None - архив выключен)
+        self.archive = archive
+
+    async def init_schema(self):
+        """Создать таблицы, если их нет (и месячные секции в PostgreSQL)"""
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await self.maintain_partitions()
+
+    async def maintain_partitions(self):
+        """Досоздать секции текущего и PARTITION_MONTHS_AHEAD следующих месяцев (PostgreSQL)"""
+        if self.engine.dialect.name != "postgresql":
+            return
+        async with self.engine.begin() as connection:
+            await ensure_partitions(connection, month_start(date.today()), settings.partition_months_ahead)
+
+    async def close(self):
+        """Закрыть пул соединений"""
+        await self.engine.dispose()
+
+    def pool_stats(self) -> dict:
+        """Состояние пула соединений движка"""
+        pool = self.engine.pool
+        if hasattr(pool, "stats"):
+            return pool.stats()
+        return {"status": pool.status()}
+
+    async def _write(self, op: WriteOp):
+        """Выполнить операцию записи в отдельной транзакции"""
+        async with self.session_factory() as session, session.begin():
+            await op(session)
+
+    async def save_tasks(self, tasks: List[ReviewTask], batch: Optional[ReviewBatch] = None):
+        """Сохранить новые задачи одним INSERT; пакет - в той же транзакции"""
+        if not tasks:
+            return
+        rows = [
+            {
+                "id": task.id,
+                "document": task.document,
+                "document_type": task.document_type,
+                "context": task.context,
+                "status": task.status.value,
+                "lane": task.lane.value,
+                "user_email": task.user_email,
+                "callback_url": task.callback_url,
+                "created_at": task.created_at,
+                "updated_at": task.updated_at
+            }
+            for task in tasks
+        ]
+
+        async def op(session: AsyncSession):
+            await session.execute(insert(ReviewTaskDB), rows)
+            if batch is not None:
+                await session.execute(insert(ReviewBatchDB).values(
+                    id=batch.id,
+                    task_ids=[str(task_id) for task_id in batch.task_ids],
+                    context=batch.context,
+                    user_email=batch.user_email,
+                    created_at=batch.created_at
+                ))
+
+        await self._write(op)
+
+    async def update_status(self, task_ids: Iterable[UUID], status: TaskStatus):
+        """Обновить статус задач"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        updated_at = datetime.utcnow()
+
+        async def op(session: AsyncSession):
+            query = update(ReviewTaskDB).where(ReviewTaskDB.id.in_(task_ids))
+            if status != TaskStatus.CANCELLED:
+                # Запоздавшая смена статуса не отменяет отмену
+                query = query.where(ReviewTaskDB.status != TaskStatus.CANCELLED.value)
+            else:
+                # Отмена с другого воркера не перезаписывает уже готовый итог
+                query = query.where(ReviewTaskDB.status.notin_(
+                    [TaskStatus.COMPLETED.value, TaskStatus.FAILED.value]
+                ))
+            await session.execute(query.values(status=status.value, updated_at=updated_at))
+
+        await self._write(op)
+
+    async def save_result(
+        self,
+        result: ReviewResult,
+        user_email: Optional[str] = None,
+        webhooks: Iterable[WebhookDelivery] = ()
+    ):
+        """Сохранить результат: строка результата, новые шаблоны и все проблемы
+        одним INSERT каждые, статус задачи и уведомления - в одной транзакции"""
+        webhook_rows = [self._webhook_row(delivery) for delivery in webhooks]
+        template_rows = {}
+        issue_rows = []
+        for issue in result.issues:
+            template_id = issue_template_id(issue.title, issue.description, issue.recommendation)
+            template_rows[template_id] = {
+                "id": template_id,
+                "title": issue.title,
+                "description": issue.description,
+                "recommendation": issue.recommendation,
+                "created_at": result.created_at
+            }
+            issue_rows.append({
+                "id": issue.id,
+                "task_id": result.task_id,
+                "agent": issue.agent.value,
+                "priority": issue.priority.value,
+                "template_id": template_id,
+                "category": issue.category,
+                "location": issue.location,
+                "issue_metadata": issue.metadata,
+                "user_email": user_email,
+                "created_at": result.created_at
+            })
+        updated_at = datetime.utcnow()
+
+        async def op(session: AsyncSession):
+            # Отмененная задача остается отмененной: результат опоздавшего пайплайна не пишем
+            status = await session.scalar(
+                select(ReviewTaskDB.status).where(ReviewTaskDB.id == result.task_id).with_for_update()
+            )
+            if status == TaskStatus.CANCELLED.value:
+                return
+            await session.execute(insert(ReviewResultDB).values(
+                task_id=result.task_id,
+                status=result.status.value,
+                summary=result.summary,
+                payload=pack_result(result),
+                quality_score=result.validation_result.quality_score if result.validation_result else None,
+                created_at=result.created_at
+            ))
+            if issue_rows:
+                # Уже известные шаблоны пропускаются
+                await session.execute(
+                    self._dialect_insert(IssueTemplateDB).on_conflict_do_nothing(index_elements=["id"]),
+                    list(template_rows.values())
+                )
+                await session.execute(insert(IssueDB), issue_rows)
+                await self._bump_issue_stats(session, result)
+            await session.execute(
+                update(ReviewTaskDB)
+                .where(ReviewTaskDB.id == result.task_id)
+                .values(status=TaskStatus.COMPLETED.value, updated_at=updated_at)
+            )
+            if webhook_rows:
+                await session.execute(insert(WebhookOutboxDB), webhook_rows)
+
+        await self._write(op)
+
+    async def enqueue_webhooks(self, deliveries: Iterable[WebhookDelivery]):
+        """Поставить уведомления в исходящую очередь"""
+        rows = [self._webhook_row(delivery) for delivery in deliveries]
+        if not rows:
+            return
+
+        async def op(session: AsyncSession):
+            await session.execute(insert(WebhookOutboxDB), rows)
+
+        await self._write(op)
+
+    async def claim_webhooks(self, limit: int, lease: float) -> List[WebhookDelivery]:
+        """Забрать готовые уведомления: сдвигаем next_attempt_at на lease, чтобы
+        другие воркеры их не взяли (в PostgreSQL - еще и SKIP LOCKED)"""
+        now = datetime.utcnow()
+        claimed: List[WebhookDelivery] = []
+
+        async def op(session: AsyncSession):
+            rows = (await session.execute(
+                select(WebhookOutboxDB)
+                .where(
+                    WebhookOutboxDB.status == WebhookStatus.PENDING.value,
+                    WebhookOutboxDB.next_attempt_at <= now
+                )
+                .order_by(WebhookOutboxDB.next_attempt_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            if not rows:
+                return
+            await session.execute(
+                update(WebhookOutboxDB)
+                .where(WebhookOutboxDB.id.in_([row.id for row in rows]))
+                .values(next_attempt_at=now + timedelta(seconds=lease))
+                .execution_options(synchronize_session=False)
+            )
+            claimed.extend(
+                WebhookDelivery(
+                    id=row.id,
+                    task_id=row.task_id,
+                    url=row.url,
+                    event=row.event,
+                    payload=row.payload,
+                    attempts=row.attempts,
+                    next_attempt_at=row.next_attempt_at,
+                    created_at=row.created_at
+                )
+                for row in rows
+            )
+
+        await self._write(op)
+        return claimed
+
+    async def record_webhook_attempt(
+        self,
+        delivery_id: UUID,
+        status: WebhookStatus,
+        attempts: int,
+        next_attempt_at: Optional[datetime] = None,
+        error: Optional[str] = None
+    ):
+        """Записать итог попытки доставки"""
+        values = {"status": status.value, "attempts": attempts, "last_error": error}
+        if next_attempt_at is not None:
+            values["next_attempt_at"] = next_attempt_at
+        if status == WebhookStatus.DELIVERED:
+            values["delivered_at"] = datetime.utcnow()
+
+        async def op(session: AsyncSession):
+            await session.execute(
+                update(WebhookOutboxDB).where(WebhookOutboxDB.id == delivery_id).values(**values)
+            )
+
+        await self._write(op)
+
+    async def get_task(self, task_id: UUID) -> Optional[ReviewTask]:
+        """Получить задачу"""
+        async with self.session_factory() as session:
+            row = await session.get(ReviewTaskDB, task_id)
+        if row is None:
+            return None
+        return ReviewTask(
+            id=row.id,
+            document=row.document,
+            document_type=row.document_type,
+            context=row.context or {},
+            user_email=row.user_email,
+            lane=TaskLane(row.lane or TaskLane.INTERACTIVE.value),
+            callback_url=row.callback_url,
+            status=TaskStatus(row.status),
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
+
+    async def get_batch(self, batch_id: UUID) -> Optional[ReviewBatch]:
+        """Получить пакет задач"""
+        async with self.session_factory() as session:
+            row = await session.get(ReviewBatchDB, batch_id)
+        if row is None:
+            return None
+        return ReviewBatch(
+            id=row.id,
+            task_ids=[UUID(task_id) for task_id in row.task_ids],
+            context=row.context or {},
+            user_email=row.user_email,
+            created_at=row.created_at
+        )
+
+    async def get_statuses(self, task_ids: Iterable[UUID]) -> Dict[UUID, TaskStatus]:
+        """Статусы нескольких задач одним запросом"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(ReviewTaskDB.id, ReviewTaskDB.status).where(ReviewTaskDB.id.in_(task_ids))
+            )
+            return {task_id: TaskStatus(status) for task_id, status in rows}
+
+    async def get_result(self, task_id: UUID) -> Optional[ReviewResult]:
+        """Получить результат анализа вместе с проблемами"""
+        async with self.session_factory() as session:
+            row = (await session.execute(
+                select(ReviewResultDB).where(ReviewResultDB.task_id == task_id)
+            )).scalar_one_or_none()
+            if row is None:
+                return await self._get_archived_result(task_id)
+            issue_rows = (await session.execute(
+                select(IssueDB).where(IssueDB.task_id == task_id)
+            )).scalars().all()
+        return self._result_from_db(row, issue_rows)
+
+    async def get_result_summaries(self, task_ids: Iterable[UUID]) -> Dict[UUID, ResultSummary]:
+        """Итоги из колонок review_results и число проблем - одним запросом"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        issue_counts = (
+            select(IssueDB.task_id, func.count().label("issues_count"))
+            .where(IssueDB.task_id.in_(task_ids))
+            .group_by(IssueDB.task_id)
+            .subquery()
+        )
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(
+                    ReviewResultDB.task_id,
+                    ReviewResultDB.summary,
+                    ReviewResultDB.quality_score,
+                    ReviewResultDB.created_at,
+                    func.coalesce(issue_counts.c.issues_count, 0)
+                )
+                .outerjoin(issue_counts, issue_counts.c.task_id == ReviewResultDB.task_id)
+                .where(ReviewResultDB.task_id.in_(task_ids))
+            )
+            return {
+                task_id: ResultSummary(
+                    task_id=task_id,
+                    summary=summary,
+                    quality_score=quality_score,
+                    created_at=created_at,
+                    issues_count=issues_count
+                )
+                for task_id, summary, quality_score, created_at, issues_count in rows
+            }
+
+    async def _get_archived_result(self, task_id: UUID) -> Optional[ReviewResult]:
+        """Результат из холодного архива"""
+        if self.archive is None:
+            return None
+        row = await asyncio.to_thread(self.archive.find_result, task_id)
+        if row is None:
+            return None
+        issue_rows = await asyncio.to_thread(self.archive.find_issues, task_id)
+        return self._result_from_db(row, issue_rows)
+
+    def _result_from_db(self, row: ReviewResultDB, issue_rows: List[IssueDB]) -> ReviewResult:
+        """Преобразование строки результата и его проблем в ReviewResult"""
+        return unpack_result(row.payload, [self._issue_from_db(issue) for issue in issue_rows])
+
+    async def search_issues(
+        self,
+        priorities: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        agents: Optional[List[str]] = None,
+        user_email: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        text: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> IssueSearchPage:
+        """Поиск проблем по всем анализам, новые первыми, с keyset-пагинацией"""
+        query = select(IssueDB)
+        if priorities:
+            query = query.where(IssueDB.priority.in_(priorities))
+        if categories:
+            query = query.where(IssueDB.category.in_(categories))
+        if agents:
+            query = query.where(IssueDB.agent.in_(agents))
+        if user_email:
+            query = query.where(IssueDB.user_email == user_email)
+        if created_from:
+            query = query.where(IssueDB.created_at >= created_from)
+        if created_to:
+            query = query.where(IssueDB.created_at < created_to)
+        if text:
+            # Текст хранится в шаблонах: фильтруем по ним же и загружаем их этим JOIN
+            query = (
+                query.join(IssueDB.template)
+                .options(contains_eager(IssueDB.template))
+                .where(self._text_filter(text))
+            )
+        position = None
+        if cursor:
+            # Продолжаем строго после последней строки предыдущей страницы
+            position = decode_cursor(cursor)
+            query = query.where(tuple_(IssueDB.created_at, IssueDB.id) < tuple_(*position))
+        query = query.order_by(IssueDB.created_at.desc(), IssueDB.id.desc()).limit(limit + 1)
+
+        async with self.session_factory() as session:
+            rows = list((await session.execute(query)).scalars().all())
+
+        if len(rows) <= limit and self.archive is not None:
+            # Горячие строки кончились - дочитываем более старые месяцы из архива
+            rows.extend(await asyncio.to_thread(
+                self._search_archive,
+                priorities, categories, agents, user_email, created_from, created_to,
+                text, position, limit + 1 - len(rows), {row.id for row in rows}
+            ))
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return IssueSearchPage(
+            items=[
+                IssueSearchHit(
+                    **self._issue_from_db(row).model_dump(),
+                    task_id=row.task_id,
+                    created_at=row.created_at
+                )
+                for row in rows
+            ],
+            next_cursor=encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        )
+
+    async def issue_stats(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        group_by: Iterable[str] = ("day",)
+    ) -> List[IssueStatsBucket]:
+        """Число проблем по дням, категориям, агентам и приоритетам (из сводной таблицы)"""
+        group_by = list(dict.fromkeys(group_by))
+        unknown = set(group_by) - set(ISSUE_STATS_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Неизвестные измерения: {', '.join(sorted(unknown))}")
+        columns = [getattr(IssueDailyStatsDB, name) for name in group_by]
+        query = select(*columns, func.sum(IssueDailyStatsDB.issue_count))
+        if date_from:
+            query = query.where(IssueDailyStatsDB.day >= date_from)
+        if date_to:
+            query = query.where(IssueDailyStatsDB.day <= date_to)
+        if columns:
+            query = query.group_by(*columns).order_by(*columns)
+
+        async with self.session_factory() as session:
+            rows = (await session.execute(query)).all()
+        return [
+            IssueStatsBucket(**dict(zip(group_by, row[:-1])), count=row[-1])
+            for row in rows if row[-1]
+        ]
+
+    async def rebuild_issue_stats(self):
+        """Пересчитать сводную таблицу по issues (для данных, записанных до ее появления)
+
+        Пересчитываются только месяцы после архивных: строк архивных месяцев
+        в issues уже нет, их счетчики остаются как есть.
+        """
+        archived = self.archive.months("issues") if self.archive is not None else []
+        hot_from = add_months(archived[0], 1) if archived else None
+        day = func.date(IssueDB.created_at)
+        counts = select(
+            day, IssueDB.category, IssueDB.agent, IssueDB.priority, func.count()
+        ).group_by(day, IssueDB.category, IssueDB.agent, IssueDB.priority)
+        stale = delete(IssueDailyStatsDB)
+        if hot_from is not None:
+            counts = counts.where(IssueDB.created_at >= month_range(hot_from)[0])
+            stale = stale.where(IssueDailyStatsDB.day >= hot_from)
+
+        async def op(session: AsyncSession):
+            rows = (await session.execute(counts)).all()
+            await session.execute(stale)
+            if rows:
+                await session.execute(insert(IssueDailyStatsDB), [
+                    {
+                        "day": row_day if isinstance(row_day, date) else date.fromisoformat(row_day),
+                        "category": category,
+                        "agent": agent,
+                        "priority": priority,
+                        "issue_count": count
+                    }
+                    for row_day, category, agent, priority, count in rows
+                ])
+
+        await self._write(op)
+
+    async def _bump_issue_stats(self, session: AsyncSession, result: ReviewResult):
+        """Прибавить проблемы результата к дневным счетчикам (UPSERT)"""
+        day = result.created_at.date()
+        counts = Counter(
+            (issue.category, issue.agent.value, issue.priority.value) for issue in result.issues
+        )
+        statement = self._dialect_insert(IssueDailyStatsDB)
+        statement = statement.on_conflict_do_update(
+            index_elements=["day", "category", "agent", "priority"],
+            set_={"issue_count": IssueDailyStatsDB.issue_count + statement.excluded.issue_count}
+        )
+        await session.execute(statement, [
+            {"day": day, "category": category, "agent": agent, "priority": priority, "issue_count": count}
+            for (category, agent, priority), count in counts.items()
+        ])
+
+    def _search_archive(
+        self,
+        priorities: Optional[List[str]],
+        categories: Optional[List[str]],
+        agents: Optional[List[str]],
+        user_email: Optional[str],
+        created_from: Optional[datetime],
+        created_to: Optional[datetime],
+        text: Optional[str],
+        position: Optional[Tuple[datetime, UUID]],
+        count: int,
+        seen: set
+    ) -> List[IssueDB]:
+        """Те же фильтры поиска по архиву; простые условия проверяет сам Parquet"""
+        filters = []
+        if priorities:
+            filters.append(("priority", "in", priorities))
+        if categories:
+            filters.append(("category", "in", categories))
+        if agents:
+            filters.append(("agent", "in", agents))
+        if user_email:
+            filters.append(("user_email", "=", user_email))
+        if created_from:
+            filters.append(("created_at", ">=", created_from))
+        if created_to:
+            filters.append(("created_at", "<", created_to))
+        if position:
+            filters.append(("created_at", "<=", position[0]))
+        months = [
+            month for month in self.archive.months("issues")
+            if (created_from is None or month >= month_start(created_from))
+            and (created_to is None or month < created_to.date())
+        ]
+        needle = text.lower() if text else None
+
+        def matches(row: IssueDB) -> bool:
+            if row.id in seen:
+                return False
+            if position and (row.created_at, row.id) >= position:
+                return False
+            return needle is None or needle in f"{row.title} {row.description}".lower()
+
+        found = []
+        for row in self.archive.iter_issues(filters, matches, months):
+            found.append(row)
+            if len(found) >= count:
+                break
+        return found
+
+    async def archive_months(self, before: date) -> List[date]:
+        """Выгрузить в архив месяцы раньше before и убрать их из горячих таблиц
+
+        Каждый месяц переносится в своей транзакции: строки пишутся в Parquet,
+        затем секция месяца удаляется (PostgreSQL) или строки удаляются (SQLite).
+        """
+        if self.archive is None:
+            raise RuntimeError("Архив не настроен (ARCHIVE_DIR)")
+        # Секции вперед - до переноса, чтобы новые строки не копились в DEFAULT
+        await self.maintain_partitions()
+        async with self.session_factory() as session:
+            firsts = [
+                (await session.execute(select(func.min(model.created_at)))).scalar()
+                for model in (IssueDB, ReviewResultDB)
+            ]
+        firsts = [first for first in firsts if first is not None]
+        if not firsts:
+            return []
+
+        archived = []
+        for month in iter_months(min(firsts).date(), month_start(before)):
+            start, end = month_range(month)
+            async with self.session_factory() as session, session.begin():
+                issues = (await session.execute(
+                    select(IssueDB).where(IssueDB.created_at >= start, IssueDB.created_at < end)
+                )).scalars().all()
+                results = (await session.execute(
+                    select(ReviewResultDB)
+                    .where(ReviewResultDB.created_at >= start, ReviewResultDB.created_at < end)
+                )).scalars().all()
+                await asyncio.to_thread(self.archive.write_issues, month, issues)
+                await asyncio.to_thread(self.archive.write_results, month, results)
+
+                if self.engine.dialect.name == "postgresql":
+                    connection = await session.connection()
+                    for table in PARTITIONED_TABLES:
+                        await drop_partition(connection, table, month)
+                # Строки месяца, попавшие в секцию по умолчанию (или все строки в SQLite)
+                await session.execute(
+                    delete(IssueDB).where(IssueDB.created_at >= start, IssueDB.created_at < end)
+                )
+                await session.execute(
+                    delete(ReviewResultDB)
+                    .where(ReviewResultDB.created_at >= start, ReviewResultDB.created_at < end)
+                )
+            if issues or results:
+                archived.append(month)
+
+        await self.maintain_partitions()
+        return archived
+
+    @staticmethod
+    def _webhook_row(delivery: WebhookDelivery) -> dict:
+        return {
+            "id": delivery.id,
+            "task_id": delivery.task_id,
+            "url": delivery.url,
+            "event": delivery.event,
+            "payload": delivery.payload,
+            "status": WebhookStatus.PENDING.value,
+            "attempts": delivery.attempts,
+            "next_attempt_at": delivery.next_attempt_at,
+            "created_at": delivery.created_at
+        }
+
+    def _dialect_insert(self, model):
+        """INSERT с поддержкой ON CONFLICT для диалекта движка"""
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        return dialect.insert(model)
+
+    def _text_filter(self, text: str):
+        """Полнотекстовый фильтр: tsvector в PostgreSQL, подстрока в остальных БД"""
+        if self.engine.dialect.name == "postgresql":
+            return issue_search_vector(IssueTemplateDB.title, IssueTemplateDB.description).op("@@")(
+                func.plainto_tsquery(settings.search_text_config, text)
+            )
+        pattern = f"%{text}%"
+        return IssueTemplateDB.title.ilike(pattern) | IssueTemplateDB.description.ilike(pattern)
+
+    def _issue_from_db(self, row: IssueDB) -> Issue:
+        """Преобразование строки в Issue"""
+        return Issue(
+            id=row.id,
+            agent=AgentType(row.agent),
+            priority=Priority(row.priority),
+            title=row.title,
+            description=row.description,
+            recommendation=row.recommendation,
+            category=row.category,
+            location=row.location,
+            metadata=row.issue_metadata or {}
+        )
+
+
+def pack_result(result: ReviewResult) -> bytes:
+    """Сжатый результат без проблем; порядок проблем (по приоритету) сохраняется отдельно"""
+    data = result.model_dump(mode="json", exclude={"issues"})
+    data["issue_order"] = [str(issue.id) for issue in result.issues]
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def unpack_result(payload: bytes, issues: List[Issue]) -> ReviewResult:
+    """Результат из сжатого вида и его проблем"""
+    data = json.loads(zlib.decompress(payload))
+    issues_by_id = {str(issue.id): issue for issue in issues}
+    ordered = [issues_by_id.pop(issue_id) for issue_id in data.pop("issue_order", []) if issue_id in issues_by_id]
+    ordered.extend(issues_by_id.values())
+    return ReviewResult(**data, issues=ordered)
+
+
+def encode_cursor(created_at: datetime, issue_id: UUID) -> str:
+    """Курсор страницы: позиция последней выданной строки"""
+    raw = json.dumps([created_at.isoformat(), str(issue_id)])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Разбор курсора страницы"""
+    try:
+        created_at, issue_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(issue_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Некорректный курсор") from e
@@ -1,23 +1,76 @@
 """Управление сессиями базы данных"""
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from src.config import settings
+from src.db.pool import pool_options
 
-# Создание движка БД
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,  # Проверка соединения перед использованием
-    echo=settings.debug  # Логирование SQL запросов в debug режиме
-)
+_engines = {}
+
+
+def get_engine():
+    """Синхронный движок БД (создается при первом обращении)"""
+    if "sync" not in _engines:
+        _engines["sync"] = create_engine(
+            settings.database_url,
+            pool_pre_ping=True,  # Проверка соединения перед использованием
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            echo=settings.debug  # Логирование SQL запросов в debug режиме
+        )
+        # Фабрика сессий
+        _engines["sync_sessions"] = sessionmaker(autocommit=False, autoflush=False, bind=_engines["sync"])
+    return _engines["sync"]
+
+
+def get_async_database_url(url: str) -> str:
+    """URL с асинхронным драйвером (asyncpg) для того же сервера"""
+    if url.startswith("postgresql+asyncpg://"):
+        return url
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def get_async_engine():
+    """Асинхронный движок для API и пайплайна (создается при первом обращении)"""
+    if "async" not in _engines:
+        _engines["async"] = create_async_engine(
+            get_async_database_url(settings.database_url),
+            pool_pre_ping=True,
+            echo=settings.debug,
+            **pool_options()
+        )
+        _engines["async_sessions"] = async_sessionmaker(_engines["async"], expire_on_commit=False)
+    return _engines["async"]
+
+
+# Движки создаются лениво: импорт модуля не тянет драйвер БД и не открывает пул,
+# пока движок не понадобился (режим memory/sqlite его не создает вовсе)
+_LAZY_NAMES = {
+    "engine": (get_engine, "sync"),
+    "SessionLocal": (get_engine, "sync_sessions"),
+    "async_engine": (get_async_engine, "async"),
+    "AsyncSessionLocal": (get_async_engine, "async_sessions"),
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_NAMES:
+        factory, key = _LAZY_NAMES[name]
+        factory()
+        return _engines[key]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Фабрика сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
     """Dependency для FastAPI"""
-    db = SessionLocal()
+    get_engine()
+    db = _engines["sync_sessions"]()
     try:
         yield db
     finally:
         db.close()
-
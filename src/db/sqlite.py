@@ -0,0 +1,184 @@
+"""Встроенное хранилище на SQLite (WAL) с пакетной фиксацией записей"""
+import asyncio
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from src.config import settings
+from src.models import ReviewTask, ReviewBatch, ReviewResult, TaskStatus, IssueSearchPage, IssueStatsBucket, ResultSummary
+from src.db.pool import pool_options
+from src.db.repository import ReviewRepository, WriteOp
+
+if TYPE_CHECKING:
+    from src.db.archive import ParquetArchive
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL: читатели не блокируют писателя; synchronous=NORMAL достаточно для WAL"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+class SQLiteRepository(ReviewRepository):
+    """Хранилище для одного узла без сервера БД
+
+    Записи копятся в очереди и фиксируются одной транзакцией раз в
+    commit_interval секунд или по достижении commit_batch_size операций
+    (group commit). Вызов записи возвращается после фиксации своего пакета,
+    поэтому последующие чтения видят записанное.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        commit_interval: Optional[float] = None,
+        commit_batch_size: Optional[int] = None,
+        archive: Optional["ParquetArchive"] = None
+    ):
+        if path == ":memory:":
+            # База в памяти живет в одном соединении - каждое новое из пула было бы пустым
+            options = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            options = pool_options()
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **options)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        super().__init__(engine, archive=archive)
+
+        self.commit_interval = (
+            commit_interval if commit_interval is not None else settings.sqlite_commit_interval_ms / 1000
+        )
+        self.commit_batch_size = commit_batch_size or settings.sqlite_commit_batch_size
+        self._pending: List[Tuple[WriteOp, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._schema_lock: Optional[asyncio.Lock] = None
+        self._schema_ready = False
+
+    async def init_schema(self):
+        """Создать таблицы, если их нет"""
+        await super().init_schema()
+        self._schema_ready = True
+
+    async def close(self):
+        """Зафиксировать очередь и закрыть соединения"""
+        await self._flush()
+        await super().close()
+
+    async def _write(self, op: WriteOp):
+        """Поставить операцию в очередь и дождаться фиксации ее пакета"""
+        await self._ensure_schema()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((op, future))
+        if len(self._pending) >= self.commit_batch_size:
+            asyncio.ensure_future(self._flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+        await future
+
+    async def _flush_later(self):
+        """Фиксировать очередь после паузы, пока она не опустеет
+
+        Записи, пришедшие во время фиксации, ждут следующего круга: _write
+        не запускает новую задачу, пока эта не завершилась.
+        """
+        while True:
+            await asyncio.sleep(self.commit_interval)
+            await self._flush()
+            if not self._pending:
+                return
+
+    async def _flush(self):
+        """Выполнить накопленные операции одной транзакцией"""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                async with self.session_factory() as session, session.begin():
+                    for op, _ in batch:
+                        await op(session)
+            except Exception:
+                # Ошибка одной операции не должна ронять весь пакет
+                await self._apply_one_by_one(batch)
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _apply_one_by_one(self, batch: List[Tuple[WriteOp, asyncio.Future]]):
+        """Выполнить операции пакета по отдельности"""
+        for op, future in batch:
+            try:
+                async with self.session_factory() as session, session.begin():
+                    await op(session)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _ensure_schema(self):
+        """Встроенная БД создает схему сама при первом обращении"""
+        if self._schema_ready:
+            return
+        if self._schema_lock is None:
+            self._schema_lock = asyncio.Lock()
+        async with self._schema_lock:
+            if not self._schema_ready:
+                await self.init_schema()
+
+    async def get_task(self, task_id: UUID) -> Optional[ReviewTask]:
+        """Получить задачу"""
+        await self._ensure_schema()
+        return await super().get_task(task_id)
+
+    async def get_batch(self, batch_id: UUID) -> Optional[ReviewBatch]:
+        """Получить пакет задач"""
+        await self._ensure_schema()
+        return await super().get_batch(batch_id)
+
+    async def get_statuses(self, task_ids: Iterable[UUID]) -> Dict[UUID, TaskStatus]:
+        """Статусы нескольких задач одним запросом"""
+        await self._ensure_schema()
+        return await super().get_statuses(task_ids)
+
+    async def get_result(self, task_id: UUID) -> Optional[ReviewResult]:
+        """Получить результат анализа вместе с проблемами"""
+        await self._ensure_schema()
+        return await super().get_result(task_id)
+
+    async def get_result_summaries(self, task_ids: Iterable[UUID]) -> Dict[UUID, ResultSummary]:
+        """Краткие итоги нескольких задач одним запросом"""
+        await self._ensure_schema()
+        return await super().get_result_summaries(task_ids)
+
+    async def search_issues(self, *args, **kwargs) -> IssueSearchPage:
+        """Поиск проблем по всем анализам"""
+        await self._ensure_schema()
+        return await super().search_issues(*args, **kwargs)
+
+    async def issue_stats(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        group_by: Iterable[str] = ("day",)
+    ) -> List[IssueStatsBucket]:
+        """Число проблем по дням, категориям, агентам и приоритетам (из сводной таблицы)"""
+        await self._ensure_schema()
+        return await super().issue_stats(date_from, date_to, group_by)
+
+    async def archive_months(self, before: date) -> List[date]:
+        """Выгрузить в архив месяцы раньше before и удалить их строки"""
+        await self._ensure_schema()
+        await self._flush()
+        return await super().archive_months(before)
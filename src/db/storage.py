@@ -0,0 +1,137 @@
+"""Интерфейс хранилища задач и результатов и выбор реализации"""
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+from src.config import settings
+from src.models import (
+    ReviewTask, ReviewBatch, ReviewResult, TaskStatus, IssueSearchPage, IssueStatsBucket, ResultSummary,
+    WebhookDelivery, WebhookStatus
+)
+
+
+class StorageBackend(ABC):
+    """Постоянное хранилище задач, проблем и результатов анализа"""
+
+    @abstractmethod
+    async def init_schema(self):
+        """Создать таблицы, если их нет"""
+
+    @abstractmethod
+    async def close(self):
+        """Дописать отложенные изменения и закрыть соединения"""
+
+    @abstractmethod
+    async def save_tasks(self, tasks: List[ReviewTask], batch: Optional[ReviewBatch] = None):
+        """Сохранить новые задачи (и пакет, в который они входят)"""
+
+    @abstractmethod
+    async def update_status(self, task_ids: Iterable[UUID], status: TaskStatus):
+        """Обновить статус задач"""
+
+    @abstractmethod
+    async def save_result(
+        self,
+        result: ReviewResult,
+        user_email: Optional[str] = None,
+        webhooks: Iterable[WebhookDelivery] = ()
+    ):
+        """Сохранить результат с проблемами, завершить задачу и поставить уведомления в очередь"""
+
+    @abstractmethod
+    async def get_task(self, task_id: UUID) -> Optional[ReviewTask]:
+        """Получить задачу"""
+
+    @abstractmethod
+    async def get_batch(self, batch_id: UUID) -> Optional[ReviewBatch]:
+        """Получить пакет задач"""
+
+    @abstractmethod
+    async def get_statuses(self, task_ids: Iterable[UUID]) -> Dict[UUID, TaskStatus]:
+        """Статусы нескольких задач"""
+
+    @abstractmethod
+    async def get_result(self, task_id: UUID) -> Optional[ReviewResult]:
+        """Получить результат анализа"""
+
+    @abstractmethod
+    async def get_result_summaries(self, task_ids: Iterable[UUID]) -> Dict[UUID, ResultSummary]:
+        """Краткие итоги нескольких задач одним запросом, без чтения проблем"""
+
+    @abstractmethod
+    async def search_issues(
+        self,
+        priorities: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        agents: Optional[List[str]] = None,
+        user_email: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        text: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> IssueSearchPage:
+        """Поиск проблем по всем анализам, новые первыми, с keyset-пагинацией"""
+
+    @abstractmethod
+    async def issue_stats(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        group_by: Iterable[str] = ("day",)
+    ) -> List[IssueStatsBucket]:
+        """Число проблем по дням, категориям, агентам и приоритетам (из сводной таблицы)"""
+
+    @abstractmethod
+    async def enqueue_webhooks(self, deliveries: Iterable[WebhookDelivery]):
+        """Поставить уведомления в исходящую очередь"""
+
+    @abstractmethod
+    async def claim_webhooks(self, limit: int, lease: float) -> List[WebhookDelivery]:
+        """Забрать готовые к отправке уведомления; до истечения lease секунд их не получат другие"""
+
+    @abstractmethod
+    async def record_webhook_attempt(
+        self,
+        delivery_id: UUID,
+        status: WebhookStatus,
+        attempts: int,
+        next_attempt_at: Optional[datetime] = None,
+        error: Optional[str] = None
+    ):
+        """Записать итог попытки доставки"""
+
+    def pool_stats(self) -> dict:
+        """Состояние пула соединений (если он есть)"""
+        return {}
+
+    async def maintain_partitions(self):
+        """Досоздать секции таблиц на следующие месяцы (если хранилище секционировано)"""
+
+    async def save_task(self, task: ReviewTask):
+        """Сохранить новую задачу"""
+        await self.save_tasks([task])
+
+    async def get_status(self, task_id: UUID) -> Optional[TaskStatus]:
+        """Получить статус задачи"""
+        statuses = await self.get_statuses([task_id])
+        return statuses.get(task_id)
+
+
+def create_storage_backend(kind: Optional[str] = None) -> Optional[StorageBackend]:
+    """Создать хранилище по имени: memory (None), postgres или sqlite"""
+    kind = (kind or settings.storage_backend).lower()
+    if kind == "memory":
+        return None
+    archive = None
+    if settings.archive_dir and kind != "memory":
+        from src.db.archive import ParquetArchive
+        archive = ParquetArchive(settings.archive_dir)
+    if kind == "postgres":
+        from src.db.repository import ReviewRepository
+        from src.db.session import async_engine
+        return ReviewRepository(async_engine, archive=archive)
+    if kind == "sqlite":
+        from src.db.sqlite import SQLiteRepository
+        return SQLiteRepository(settings.sqlite_path, archive=archive)
+    raise ValueError(f"Неизвестное хранилище: {kind}")
@@ -1,9 +1,12 @@
 """Модели данных для DocReview AI"""
-from datetime import datetime
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date, datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 
 class Priority(str, Enum):
@@ -29,6 +32,45 @@ class TaskStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class WebhookStatus(str, Enum):
+    """Состояние доставки уведомления"""
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+class TaskLane(str, Enum):
+    """Полоса планировщика"""
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+class _TextPool:
+    """Общие экземпляры повторяющихся текстов (LRU)
+
+    Агенты постоянно выдают одни и те же типовые проблемы: одинаковые
+    тексты хранятся в памяти одним объектом.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._pool: "OrderedDict[str, str]" = OrderedDict()
+
+    def intern(self, value: str) -> str:
+        existing = self._pool.get(value)
+        if existing is not None:
+            self._pool.move_to_end(value)
+            return existing
+        self._pool[value] = value
+        if len(self._pool) > self.max_entries:
+            self._pool.popitem(last=False)
+        return value
+
+
+issue_text_pool = _TextPool()
 
 
 class Issue(BaseModel):
@@ -42,6 +84,63 @@ class Issue(BaseModel):
     category: str
     location: Optional[str] = None  # Где в документе найдена проблема
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @field_validator("title", "description", "recommendation")
+    @classmethod
+    def _intern_text(cls, value: str) -> str:
+        return issue_text_pool.intern(value)
+
+
+class IssueSearchHit(Issue):
+    """Проблема, найденная поиском по всем анализам"""
+    task_id: UUID
+    created_at: datetime
+
+
+class IssueSearchPage(BaseModel):
+    """Страница результатов поиска проблем"""
+    items: List[IssueSearchHit] = Field(default_factory=list)
+    next_cursor: Optional[str] = None  # None - страниц больше нет
+
+
+class IssueStatsBucket(BaseModel):
+    """Число проблем в группе статистики (поля вне группировки - None)"""
+    day: Optional[date] = None
+    category: Optional[str] = None
+    agent: Optional[AgentType] = None
+    priority: Optional[Priority] = None
+    count: int
+
+
+class ResultSummary(BaseModel):
+    """Краткий итог анализа без проблем и отчетов"""
+    task_id: UUID
+    summary: str
+    issues_count: int
+    quality_score: Optional[float] = None
+    created_at: datetime
+
+    @classmethod
+    def of(cls, result: "ReviewResult") -> "ResultSummary":
+        return cls(
+            task_id=result.task_id,
+            summary=result.summary,
+            issues_count=len(result.issues),
+            quality_score=result.validation_result.quality_score if result.validation_result else None,
+            created_at=result.created_at
+        )
+
+
+class WebhookDelivery(BaseModel):
+    """Уведомление в исходящей очереди (outbox)"""
+    id: UUID = Field(default_factory=uuid4)
+    task_id: UUID
+    url: str
+    event: str  # review.completed, review.failed
+    payload: Dict[str, Any]
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class AnalysisResult(BaseModel):
@@ -63,6 +162,8 @@ class ValidationResult(BaseModel):
     conflicts: List[str] = Field(default_factory=list)
     criticality_assessment: Dict[str, Priority] = Field(default_factory=dict)
     recommendations: List[str] = Field(default_factory=list)
+    agent_feedback: Dict[AgentType, List[str]] = Field(default_factory=dict)  # Замечания для доработки
+    iterations: int = 1  # Раундов валидации
 
 
 class ReviewTask(BaseModel):
@@ -71,21 +172,106 @@ class ReviewTask(BaseModel):
     document: str  # Содержимое документации
     document_type: str = "markdown"
     context: Dict[str, Any] = Field(default_factory=dict)
+    user_email: Optional[str] = None  # Тенант для планировщика
+    lane: TaskLane = TaskLane.INTERACTIVE
+    callback_url: Optional[str] = None  # Куда отправить уведомление о завершении
     status: TaskStatus = TaskStatus.PENDING
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    def fingerprint(self) -> str:
+        """Хеш задачи для объединения одинаковых анализов: документ, тип и контекст
+
+        Тенант и очередь тоже входят в хеш - иначе чужая задача заняла бы
+        слот планировщика другого тенанта или другой очереди.
+        """
+        payload = json.dumps(
+            [self.user_email, self.lane.value, self.document_type, self.document, self.context],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReviewBatch(BaseModel):
+    """Пакет задач с общим контекстом"""
+    id: UUID = Field(default_factory=uuid4)
+    task_ids: List[UUID] = Field(default_factory=list)
+    context: Dict[str, Any] = Field(default_factory=dict)
+    user_email: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AgentSummary(BaseModel):
+    """Итог работы агента для отчета"""
+    status: TaskStatus
+    issues_count: int
+    confidence: float
+    summary: str
+
+
+# Ключи, id, enum-значения и даты в JSON результата и проблемы (замерено на типовых отчетах)
+RESULT_SIZE_OVERHEAD = 400
+ISSUE_SIZE_OVERHEAD = 200
 
 
 class ReviewResult(BaseModel):
-    """Финальный результат анализа"""
+    """Финальный результат анализа
+
+    Хранится только структура; Markdown и JSON отчеты строятся при каждом
+    обращении к report_markdown / report_json (API кэширует их отдельно,
+    чтобы отчеты учитывались в лимитах памяти). Результат неизменен,
+    поэтому хэш содержимого (content_hash) считается один раз.
+    """
     task_id: UUID
     status: TaskStatus
     issues: List[Issue] = Field(default_factory=list)
     summary: str
-    report_markdown: str
-    report_json: Dict[str, Any]
+    agent_summaries: Dict[AgentType, AgentSummary] = Field(default_factory=dict)
     validation_result: Optional[ValidationResult] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    _content_hash: Optional[str] = PrivateAttr(default=None)
+    
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 канонического JSON результата (основа ETag)"""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()
+        return self._content_hash
+    
+    def approx_size(self) -> int:
+        """Примерный размер результата в JSON, символов - для лимитов хранилища
+
+        Считается по длине текстов без сериализации: вызывается на каждой
+        вставке в кэш результатов, в том числе на пути завершения анализа.
+        """
+        return RESULT_SIZE_OVERHEAD + len(self.summary) + sum(
+            ISSUE_SIZE_OVERHEAD + len(issue.title) + len(issue.description) + len(issue.recommendation)
+            + len(issue.category) + len(issue.location or "")
+            for issue in self.issues
+        )
+    
+    @property
+    def report_markdown(self) -> str:
+        """Markdown отчет"""
+        from src.core.synthesizer.report import render_markdown
+        return render_markdown(self)
+    
+    @property
+    def report_json(self) -> Dict[str, Any]:
+        """JSON отчет"""
+        from src.core.synthesizer.report import render_json
+        return render_json(self)
+    
+    def for_task(self, task_id: UUID) -> "ReviewResult":
+        """Копия результата для другой задачи (проблемы получают новые id)"""
+        issues = [issue.model_copy(update={"id": uuid4()}) for issue in self.issues]
+        result = self.model_copy(update={"task_id": task_id, "issues": issues})
+        # Копия содержит новые id - хэш считается заново
+        result._content_hash = None
+        return result
 
 
 class Strategy(BaseModel):
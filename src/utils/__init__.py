@@ -1,5 +1,9 @@
 """Утилиты"""
 from .ai_client import AIClient
+from .bounded_store import BoundedStore
+from .cache import ReadThroughCache
+from .coalescer import RequestCoalescer
+from .rate_limiter import RateLimiter, llm_limiter
+from .token_usage import TokenUsage, current_usage, record_tokens
 
-__all__ = ["AIClient"]
-
+__all__ = ["AIClient", "BoundedStore", "ReadThroughCache", "RequestCoalescer", "RateLimiter", "llm_limiter", "TokenUsage", "current_usage", "record_tokens"]
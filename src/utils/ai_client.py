@@ -1,8 +1,9 @@
 """Клиент для работы с OpenAI API"""
 import os
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
 from src.config import settings
+from src.utils.rate_limiter import llm_limiter
+from src.utils.token_usage import record_tokens
 
 
 class AIClient:
@@ -24,7 +25,9 @@ class AIClient:
             if base_url:
                 client_kwargs["base_url"] = base_url
             
-            self.client = OpenAI(**client_kwargs)
+            # openai импортируется ~0.5 с - только когда клиент действительно нужен
+            from openai import AsyncOpenAI
+            self.client = AsyncOpenAI(**client_kwargs)
             self._api_key_set = True
         
         # Для DeepSeek используем модель deepseek-chat, если base_url указан
@@ -52,12 +55,17 @@ class AIClient:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature or self.temperature,
-            max_tokens=self.max_tokens
-        )
+        # Асинхронный клиент: отмена задачи обрывает HTTP-запрос
+        async with llm_limiter:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature or self.temperature,
+                max_tokens=self.max_tokens
+            )
+        
+        if response.usage is not None:
+            record_tokens(response.usage.total_tokens)
         
         return response.choices[0].message.content
     
@@ -0,0 +1,138 @@
+"""Ограниченное in-memory хранилище с TTL и вытеснением LRU"""
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+
+class _Entry:
+    """Запись хранилища"""
+
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: Optional[float], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class BoundedStore(MutableMapping):
+    """Словарь с лимитом записей и байт, TTL и вытеснением давно не читанных записей
+
+    evictable(value) запрещает вытеснять записи, которые еще нужны (например,
+    выполняющиеся задачи). on_evict(key, value) вызывается для каждой
+    вытесненной или просроченной записи - через него записи можно сбросить
+    в постоянное хранилище.
+    """
+
+    # Полная проверка TTL не чаще раза в секунду
+    PURGE_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        evictable: Optional[Callable[[Any], bool]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.evictable = evictable
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._next_purge = 0.0
+        # Есть ли записи со сроком жизни (TTL хранилища или заданный при записи)
+        self._expiring = bool(ttl)
+        self.evictions = 0
+
+    def __getitem__(self, key: Hashable) -> Any:
+        entry = self._data[key]
+        if self._is_expired(entry, time.monotonic()) and self._can_evict(entry):
+            self._evict(key)
+            raise KeyError(key)
+        self._data.move_to_end(key)
+        return entry.value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Записать значение; ttl переопределяет TTL хранилища для этой записи"""
+        if key in self._data:
+            self._remove(key)
+        size = self.sizeof(value) if self.sizeof else 0
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._expiring = self._expiring or expires_at is not None
+        self._data[key] = _Entry(value, expires_at, size)
+        self._bytes += size
+        self._shrink()
+
+    def __delitem__(self, key: Hashable):
+        self._remove(key)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def total_bytes(self) -> int:
+        """Оценка занятого объема"""
+        return self._bytes
+
+    def stats(self) -> dict:
+        """Состояние хранилища"""
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+    def _shrink(self):
+        """Убрать просроченные записи и вытеснить LRU до соблюдения лимитов"""
+        now = time.monotonic()
+        if self._expiring and now >= self._next_purge:
+            self._next_purge = now + self.PURGE_INTERVAL
+            for key, entry in list(self._data.items()):
+                if self._is_expired(entry, now) and self._can_evict(entry):
+                    self._evict(key)
+
+        if not self._over_limit():
+            return
+        # Самые давние по обращению - в начале
+        for key, entry in list(self._data.items()):
+            if not self._over_limit():
+                break
+            if self._can_evict(entry):
+                self._evict(key)
+
+    def _over_limit(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= now
+
+    def _can_evict(self, entry: _Entry) -> bool:
+        return self.evictable is None or self.evictable(entry.value)
+
+    def _evict(self, key: Hashable):
+        entry = self._remove(key)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, entry.value)
+
+    def _remove(self, key: Hashable) -> _Entry:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+        return entry
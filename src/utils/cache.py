@@ -0,0 +1,112 @@
+"""Двухуровневый кэш чтения: локальная память процесса и общий Redis"""
+import logging
+from typing import Dict, Iterable, Optional
+from src.utils.bounded_store import BoundedStore
+
+logger = logging.getLogger(__name__)
+
+
+class ReadThroughCache:
+    """Кэш строковых значений с TTL на запись
+
+    Локальный уровень отвечает без сетевого запроса, Redis (если задан
+    redis_url) делит значения между воркерами. Ошибки Redis не ломают
+    запрос: значение считается промахом и читается из источника.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        redis_url: Optional[str] = None,
+        max_connections: int = 50,
+        pool_timeout: float = 5.0
+    ):
+        self.local = BoundedStore(max_entries=max_entries)
+        self.redis_url = redis_url
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self._redis = None
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        """Значение по ключу или None"""
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Значения найденных ключей: сначала локально, остальные одним MGET"""
+        keys = list(keys)
+        found = {key: self.local[key] for key in keys if key in self.local}
+        missing = [key for key in keys if key not in found]
+        client = self._client()
+        if missing and client is not None:
+            try:
+                values = await client.mget(missing)
+            except Exception as e:
+                logger.warning(f"Redis недоступен, читаем из источника: {e}")
+                values = [None] * len(missing)
+            for key, value in zip(missing, values):
+                if value is not None:
+                    found[key] = value
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set(self, key: str, value: str, ttl: float, local_ttl: Optional[float] = None):
+        """Записать значение на оба уровня; local_ttl=0 - только в Redis"""
+        await self.set_many({key: value}, ttl, local_ttl)
+
+    async def set_many(self, values: Dict[str, str], ttl: float, local_ttl: Optional[float] = None):
+        """Записать значения с одним TTL (в Redis - одним конвейером)"""
+        local_ttl = ttl if local_ttl is None else local_ttl
+        for key, value in values.items():
+            if local_ttl:
+                self.local.set(key, value, ttl=local_ttl)
+            else:
+                self.local.pop(key, None)
+        client = self._client()
+        if values and client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in values.items():
+                        pipe.set(key, value, px=int(ttl * 1000))
+                    await pipe.execute()
+            except Exception as e:
+                # Устаревшее значение в Redis проживет не дольше своего TTL
+                logger.warning(f"Не удалось записать в Redis: {e}")
+
+    async def close(self):
+        """Закрыть соединение с Redis"""
+        if self._redis is not None:
+            await self._redis.aclose()
+            await self._pool.disconnect()
+            self._redis = None
+            self._pool = None
+
+    def stats(self) -> dict:
+        """Попадания и промахи"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "local": self.local.stats(),
+            "redis": self.redis_url is not None
+        }
+
+    def pool_stats(self) -> dict:
+        """Состояние пула соединений Redis"""
+        return self._pool.stats() if self._pool is not None else {}
+
+    def _client(self):
+        """Ленивое подключение к Redis"""
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as redis
+            from src.utils.redis_pool import InstrumentedRedisPool
+            self._pool = InstrumentedRedisPool.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
+                timeout=self.pool_timeout,
+                decode_responses=True
+            )
+            self._redis = redis.Redis(connection_pool=self._pool)
+        return self._redis
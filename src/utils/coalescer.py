@@ -0,0 +1,65 @@
+"""Объединение одинаковых одновременных запросов в одно выполнение"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+
+class _Flight:
+    """Выполняющийся запрос и его подписчики"""
+
+    __slots__ = ("task", "leader", "subscribers")
+
+    def __init__(self, task: asyncio.Task, leader: Hashable):
+        self.task = task
+        self.leader = leader
+        self.subscribers: Set[Hashable] = set()
+
+
+class RequestCoalescer:
+    """Первый запрос с ключом запускает выполнение, остальные подключаются к нему
+
+    Выполнение отменяется, только когда от него отписались все подписчики.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    async def run(
+        self,
+        key: str,
+        subscriber: Hashable,
+        factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Выполнить factory() или подключиться к уже идущему выполнению с тем же ключом"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()), subscriber)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        flight.subscribers.add(subscriber)
+
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Отменили подписчика, а не выполнение
+            if not flight.task.done():
+                flight.subscribers.discard(subscriber)
+                if not flight.subscribers:
+                    flight.task.cancel()
+            raise
+        finally:
+            flight.subscribers.discard(subscriber)
+
+    def leader(self, key: str) -> Optional[Hashable]:
+        """Подписчик, запустивший выполнение"""
+        flight = self._flights.get(key)
+        return flight.leader if flight else None
+
+    def subscribers(self, key: str) -> List[Hashable]:
+        """Текущие подписчики выполнения"""
+        flight = self._flights.get(key)
+        return list(flight.subscribers) if flight else []
+
+    def _forget(self, key: str, flight: _Flight):
+        """Убрать завершенное выполнение"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,98 @@
+"""Наблюдаемая длительность этапов пайплайна - для оценки времени ожидания"""
+import time
+from typing import Dict, Optional, Sequence
+
+# Этапы в порядке выполнения
+PIPELINE_STAGES = ("director", "agents", "critic", "refinement", "synthesizer")
+
+
+class StageLatencies:
+    """Экспоненциальное скользящее среднее длительности этапов
+
+    Вклад этапа в прогон - среднее, умноженное на число замеров этапа на
+    завершенный прогон (доработок бывает ноль или несколько раундов). Пока
+    ни один прогон не завершен, каждый этап оценивается равной долей
+    default_total.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[str] = PIPELINE_STAGES,
+        default_total: float = 180.0,
+        alpha: float = 0.2
+    ):
+        self.stages = tuple(stages)
+        self.default_total = default_total
+        self.alpha = alpha
+        self._averages: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self.runs = 0
+
+    def observe(self, stage: str, seconds: float):
+        """Учесть длительность этапа"""
+        average = self._averages.get(stage)
+        self._averages[stage] = seconds if average is None else average + self.alpha * (seconds - average)
+        self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def estimate(self, stage: str) -> float:
+        """Ожидаемое время этапа в одном прогоне, секунд"""
+        if not self.runs:
+            return self.default_total / len(self.stages)
+        if stage not in self._averages:
+            return 0.0
+        return self._averages[stage] * self._counts[stage] / self.runs
+
+    def total(self) -> float:
+        """Ожидаемая длительность всего пайплайна"""
+        return self.remaining()
+
+    def remaining(self, current: Optional[str] = None) -> float:
+        """Сколько осталось, если сейчас идет этап current (None - пайплайн еще не начат)
+
+        Текущий этап считается выполненным наполовину.
+        """
+        if current not in self.stages:
+            return sum(self.estimate(stage) for stage in self.stages)
+        index = self.stages.index(current)
+        return self.estimate(current) / 2 + sum(self.estimate(stage) for stage in self.stages[index + 1:])
+
+    def timer(self) -> "StageTimer":
+        """Замер этапов одного прогона"""
+        return StageTimer(self)
+
+    def stats(self) -> dict:
+        """Средние по этапам для /api/v1/scheduler/stats"""
+        return {
+            "runs": self.runs,
+            "pipeline_seconds": round(self.total(), 3),
+            "stages": {
+                stage: {"avg_seconds": round(self._averages.get(stage, 0.0), 3), "samples": self._counts.get(stage, 0)}
+                for stage in self.stages
+            }
+        }
+
+
+class StageTimer:
+    """Засекает этапы одного прогона: enter() закрывает предыдущий этап"""
+
+    __slots__ = ("latencies", "stage", "started_at")
+
+    def __init__(self, latencies: StageLatencies):
+        self.latencies = latencies
+        self.stage: Optional[str] = None
+        self.started_at = 0.0
+
+    def enter(self, stage: str):
+        """Начался этап stage"""
+        now = time.monotonic()
+        if self.stage is not None:
+            self.latencies.observe(self.stage, now - self.started_at)
+        self.stage = stage
+        self.started_at = now
+
+    def finish(self):
+        """Прогон завершен успешно - записать последний этап"""
+        if self.stage is not None:
+            self.latencies.observe(self.stage, time.monotonic() - self.started_at)
+            self.stage = None
+        self.latencies.runs += 1
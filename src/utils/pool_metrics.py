@@ -0,0 +1,45 @@
+"""Метрики пулов соединений"""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class PoolMetrics:
+    """Счетчики выдачи соединений: ожидание, переполнение, отказы"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_events = 0  # Открыто соединений сверх постоянного размера пула
+        self.failed_checkouts = 0  # Таймауты ожидания и ошибки подключения
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @contextmanager
+    def waiting(self) -> Iterator[None]:
+        """Замерить ожидание соединения; исключение считается отказом"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.failed_checkouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def record_checkout(self, overflow: bool = False):
+        """Учесть выданное соединение (overflow - для него открыто соединение сверх пула)"""
+        self.checkouts += 1
+        if overflow:
+            self.overflow_events += 1
+
+    def stats(self) -> dict:
+        """Сводка для /api/v1/pools/stats"""
+        return {
+            "checkouts": self.checkouts,
+            "overflow_events": self.overflow_events,
+            "failed_checkouts": self.failed_checkouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3)
+        }
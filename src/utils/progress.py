@@ -0,0 +1,174 @@
+"""События хода анализа: публикация из пайплайна и подписка (SSE)"""
+import asyncio
+import json
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+from src.utils.bounded_store import BoundedStore
+
+# (id, тип, данные); id растет в пределах задачи - для Last-Event-ID
+ProgressEvent = Tuple[int, str, Dict[str, Any]]
+
+# Куда пайплайн текущей задачи отправляет события
+current_progress: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar(
+    "current_progress", default=None
+)
+
+
+def report_progress(event: str, **data: Any):
+    """Отправить событие хода текущего анализа (без подписчика - ничего не делает)"""
+    emit = current_progress.get()
+    if emit is not None:
+        emit(event, data)
+
+
+class _Channel:
+    """История событий задачи и ее подписчики"""
+
+    __slots__ = ("events", "subscribers", "closed", "next_id")
+
+    def __init__(self, history_size: int):
+        self.events: Deque[ProgressEvent] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.closed = False
+        self.next_id = 1
+
+
+class ProgressHub:
+    """Каналы событий по задачам
+
+    Подписчик сначала получает историю (после last_event_id), затем новые
+    события. Канал закрывается финальным событием и хранится еще retention
+    секунд, чтобы опоздавший клиент увидел итог.
+    """
+
+    def __init__(self, history_size: int = 200, retention: float = 300, max_channels: int = 10000):
+        self.history_size = history_size
+        self.retention = retention
+        self._channels = BoundedStore(max_entries=max_channels, evictable=lambda channel: channel.closed)
+
+    def publish(self, key: Hashable, event: str, data: Dict[str, Any], final: bool = False):
+        """Добавить событие в канал задачи; final закрывает канал"""
+        channel = self._channel(key)
+        if channel.closed:
+            return
+        item = (channel.next_id, event, data)
+        channel.next_id += 1
+        channel.events.append(item)
+        for queue in channel.subscribers:
+            queue.put_nowait(item)
+        if final:
+            channel.closed = True
+            for queue in channel.subscribers:
+                queue.put_nowait(None)
+            self._channels.set(key, channel, ttl=self.retention)
+
+    def copy_history(self, source: Hashable, target: Hashable):
+        """Повторить в канале target уже случившиеся события source (подключение к идущему анализу)"""
+        source_channel = self._channels.get(source)
+        if source_channel is None:
+            return
+        for _, event, data in list(source_channel.events):
+            if event != "status":
+                self.publish(target, event, data)
+
+    def has_channel(self, key: Hashable) -> bool:
+        return key in self._channels
+
+    def latest(self, key: Hashable, event: str) -> Optional[ProgressEvent]:
+        """Последнее событие типа event (None - не было или вытеснено из истории)"""
+        channel = self._channels.get(key)
+        if channel is not None:
+            for item in reversed(channel.events):
+                if item[1] == event:
+                    return item
+        return None
+
+    def version(self, key: Hashable, event: str = "status") -> int:
+        """id последнего события типа event (0 - событий не было)"""
+        item = self.latest(key, event)
+        return item[0] if item is not None else 0
+
+    async def wait(
+        self,
+        key: Hashable,
+        after: int,
+        timeout: float,
+        event: str = "status"
+    ) -> Optional[ProgressEvent]:
+        """Дождаться события типа event с id больше after; None - не дождались за timeout"""
+        channel = self._channel(key)
+        for item in reversed(channel.events):
+            if item[0] <= after:
+                break
+            if item[1] == event:
+                return item
+        if channel.closed:
+            return None
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=max(remaining, 0))
+                except asyncio.TimeoutError:
+                    return None
+                if item is None or item[1] == event:
+                    return item
+        finally:
+            channel.subscribers.discard(queue)
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        last_event_id: int = 0,
+        heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """События задачи до финального; None - пульс раз в heartbeat секунд тишины"""
+        channel = self._channel(key)
+        history = [item for item in channel.events if item[0] > last_event_id]
+        if channel.closed:
+            for item in history:
+                yield item
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        try:
+            for item in history:
+                yield item
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is None:
+                    return
+                yield item
+        finally:
+            channel.subscribers.discard(queue)
+
+    def stats(self) -> dict:
+        """Каналы и подписчики"""
+        channels = list(self._channels.values())
+        return {
+            "channels": len(channels),
+            "open": sum(1 for channel in channels if not channel.closed),
+            "subscribers": sum(len(channel.subscribers) for channel in channels)
+        }
+
+    def _channel(self, key: Hashable) -> _Channel:
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = _Channel(self.history_size)
+            self._channels[key] = channel
+        return channel
+
+
+def format_sse(event_id: int, event: str, data: Dict[str, Any]) -> str:
+    """Событие в формате text/event-stream"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -0,0 +1,73 @@
+"""Общий ограничитель запросов к LLM"""
+import asyncio
+import time
+from typing import Optional
+from src.config import settings
+
+
+class RateLimiter:
+    """Ограничение параллельности и частоты запросов (token bucket)"""
+
+    def __init__(self, max_concurrent: int, requests_per_minute: int):
+        self.max_concurrent = max_concurrent
+        self.requests_per_minute = requests_per_minute
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tokens = float(requests_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self.in_flight = 0
+        self.waiting = 0  # Запросов ждут слота или токена - признак насыщения
+
+    async def __aenter__(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._lock = asyncio.Lock()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def drain_time(self, backlog: int) -> float:
+        """Секунд, за которые лимит частоты пропустит backlog запросов"""
+        return backlog * 60.0 / self.requests_per_minute
+
+    def stats(self) -> dict:
+        """Занятость лимитера"""
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "requests_per_minute": self.requests_per_minute
+        }
+
+    async def _take_token(self):
+        """Дождаться токена на запрос"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                rate = self.requests_per_minute / 60.0
+                self._tokens = min(
+                    float(self.requests_per_minute),
+                    self._tokens + (now - self._updated_at) * rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / rate)
+
+
+# Единый лимитер на процесс: все AIClient делят квоту провайдера
+llm_limiter = RateLimiter(settings.llm_max_concurrent, settings.llm_requests_per_minute)
@@ -0,0 +1,35 @@
+"""Пул соединений Redis с метриками"""
+import redis.asyncio as redis
+from src.utils.pool_metrics import PoolMetrics
+
+
+class InstrumentedRedisPool(redis.BlockingConnectionPool):
+    """BlockingConnectionPool: ждет свободное соединение до timeout и считает ожидание"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # Выданные соединения; при ошибке подключения пул сам возвращает соединение
+        self._checked_out = set()
+
+    async def get_connection(self, *args, **kwargs):
+        with self.metrics.waiting():
+            connection = await super().get_connection(*args, **kwargs)
+        self._checked_out.add(id(connection))
+        self.metrics.record_checkout()
+        return connection
+
+    async def release(self, connection):
+        self._checked_out.discard(id(connection))
+        await super().release(connection)
+
+    def stats(self) -> dict:
+        """Текущее состояние пула и накопленные метрики"""
+        stats = self.metrics.stats()
+        # Сверх max_connections Redis-пул не выдает - только ждет
+        stats.pop("overflow_events")
+        return {
+            "max_connections": self.max_connections,
+            "checked_out": len(self._checked_out),
+            **stats
+        }
@@ -0,0 +1,25 @@
+"""Учет расхода токенов LLM в рамках задачи"""
+from contextvars import ContextVar
+from typing import Optional
+
+
+class TokenUsage:
+    """Счетчик токенов, потраченных одной задачей"""
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, tokens: int):
+        """Добавить потраченные токены"""
+        self.total += max(0, tokens)
+
+
+# Счетчик текущей задачи (устанавливается планировщиком)
+current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("current_usage", default=None)
+
+
+def record_tokens(tokens: int):
+    """Записать токены в счетчик текущей задачи, если он есть"""
+    usage = current_usage.get()
+    if usage is not None:
+        usage.add(tokens)
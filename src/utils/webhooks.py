@@ -0,0 +1,262 @@
+"""Доставка уведомлений о завершении анализа (webhooks) из исходящей очереди"""
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import logging
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlsplit
+from uuid import UUID
+import orjson
+from src.models import WebhookDelivery, WebhookStatus
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-DocReview-Signature"
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """Подпись тела: t=<unix time>,v1=<HMAC-SHA256(secret, "<t>.<body>")>
+
+    Получатель пересчитывает HMAC и отклоняет старые t (защита от повтора).
+    """
+    digest = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + body, hashlib.sha256)
+    return f"t={timestamp},v1={digest.hexdigest()}"
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_callback_url(
+    url: str,
+    allowed_hosts: Sequence[str] = (),
+    allow_private: bool = False
+) -> Optional[str]:
+    """Причина отказа для адреса уведомления (None - адрес допустим)
+
+    Сервер сам делает POST на этот адрес, поэтому без ограничений через него
+    можно достучаться до внутренних сервисов (loopback, частные сети,
+    метаданные облака 169.254.169.254). Хост проверяется по allowed_hosts,
+    а все адреса, в которые он разрешается, должны быть публичными.
+    Проверка повторяется перед каждой отправкой - DNS мог смениться.
+    """
+    host = (urlsplit(url).hostname or "").lower().rstrip(".")
+    if not host:
+        return "в адресе нет хоста"
+    if allowed_hosts and not any(
+        host == allowed.lower() or (allowed.startswith(".") and host.endswith(allowed.lower()))
+        for allowed in allowed_hosts
+    ):
+        return f"хост {host} не входит в список разрешенных"
+    if allow_private:
+        return None
+    try:
+        addresses = [ipaddress.ip_address(host).compressed]
+    except ValueError:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except OSError as e:
+            return f"не удалось разрешить {host}: {e}"
+        addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        if not _is_public_address(address):
+            return f"{host} указывает на внутренний адрес {address}"
+    return None
+
+
+class MemoryWebhookOutbox:
+    """Очередь уведомлений в памяти процесса - для режима без постоянного хранилища"""
+
+    def __init__(self):
+        self._pending: Dict[UUID, WebhookDelivery] = {}
+
+    async def enqueue_webhooks(self, deliveries: Iterable[WebhookDelivery]):
+        for delivery in deliveries:
+            self._pending[delivery.id] = delivery
+
+    async def claim_webhooks(self, limit: int, lease: float) -> List[WebhookDelivery]:
+        now = datetime.utcnow()
+        due = sorted(
+            (delivery for delivery in self._pending.values() if delivery.next_attempt_at <= now),
+            key=lambda delivery: delivery.next_attempt_at
+        )[:limit]
+        for delivery in due:
+            delivery.next_attempt_at = now + timedelta(seconds=lease)
+        return [delivery.model_copy() for delivery in due]
+
+    async def record_webhook_attempt(
+        self,
+        delivery_id: UUID,
+        status: WebhookStatus,
+        attempts: int,
+        next_attempt_at: Optional[datetime] = None,
+        error: Optional[str] = None
+    ):
+        delivery = self._pending.get(delivery_id)
+        if delivery is None:
+            return
+        if status != WebhookStatus.PENDING:
+            del self._pending[delivery_id]
+            return
+        delivery.attempts = attempts
+        if next_attempt_at is not None:
+            delivery.next_attempt_at = next_attempt_at
+
+
+class WebhookDispatcher:
+    """Фоновая доставка уведомлений с повторами и экспоненциальной задержкой
+
+    Работает отдельной asyncio-задачей: пайплайн только пишет уведомление в
+    очередь (outbox) и не ждет получателя. Очередь - постоянное хранилище
+    (переживает перезапуск, несколько воркеров делят ее через lease) или
+    MemoryWebhookOutbox.
+    """
+
+    def __init__(
+        self,
+        outbox,
+        secret: Optional[str] = None,
+        timeout: float = 10.0,
+        max_attempts: int = 8,
+        backoff_base: float = 5.0,
+        backoff_max: float = 3600.0,
+        poll_interval: float = 5.0,
+        batch_size: int = 50,
+        max_concurrent: int = 10,
+        allowed_hosts: Sequence[str] = (),
+        allow_private: bool = False
+    ):
+        self.outbox = outbox
+        self.secret = secret
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        # Захваченные доставки начинаются сразу, не дожидаясь семафора: иначе
+        # последние волны стартовали бы после истечения lease и дублировались
+        self.batch_size = min(batch_size, max_concurrent)
+        self.allowed_hosts = tuple(allowed_hosts)
+        self.allow_private = allow_private
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self):
+        """Запустить фоновую доставку"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить доставку; неотправленное останется в очереди"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def notify(self):
+        """Разбудить обработчик после постановки уведомлений в очередь"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> dict:
+        """Счетчики доставки"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed
+        }
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                deliveries = await self.outbox.claim_webhooks(self.batch_size, lease=self.timeout * 2)
+            except Exception as e:
+                logger.warning(f"Не удалось прочитать очередь уведомлений: {e}")
+                deliveries = []
+            if deliveries:
+                await asyncio.gather(*(self._deliver(delivery) for delivery in deliveries))
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, delivery: WebhookDelivery):
+        """Одна попытка доставки и запись ее итога"""
+        async with self._semaphore:
+            attempts = delivery.attempts + 1
+            blocked = await check_callback_url(delivery.url, self.allowed_hosts, self.allow_private)
+            error = blocked or await self._post(delivery)
+            try:
+                if error is None:
+                    self.delivered += 1
+                    await self.outbox.record_webhook_attempt(delivery.id, WebhookStatus.DELIVERED, attempts)
+                elif blocked or attempts >= self.max_attempts:
+                    self.failed += 1
+                    logger.error(f"Webhook {delivery.id} for task {delivery.task_id} failed: {error}")
+                    await self.outbox.record_webhook_attempt(
+                        delivery.id, WebhookStatus.FAILED, attempts, error=error
+                    )
+                else:
+                    self.retried += 1
+                    await self.outbox.record_webhook_attempt(
+                        delivery.id,
+                        WebhookStatus.PENDING,
+                        attempts,
+                        next_attempt_at=datetime.utcnow() + timedelta(seconds=self._backoff(attempts)),
+                        error=error
+                    )
+            except Exception as e:
+                # Уведомление вернется в работу после истечения lease
+                logger.warning(f"Не удалось записать итог доставки {delivery.id}: {e}")
+
+    async def _post(self, delivery: WebhookDelivery) -> Optional[str]:
+        """POST уведомления; None - доставлено, иначе текст ошибки"""
+        body = orjson.dumps(delivery.payload)
+        headers = {
+            "Content-Type": "application/json",
+            "X-DocReview-Event": delivery.event,
+            "X-DocReview-Delivery": str(delivery.id)
+        }
+        if self.secret:
+            headers[SIGNATURE_HEADER] = sign_payload(self.secret, int(time.time()), body)
+        try:
+            response = await self._http().post(delivery.url, content=body, headers=headers)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        if 200 <= response.status_code < 300:
+            return None
+        return f"HTTP {response.status_code}"
+
+    def _backoff(self, attempts: int) -> float:
+        """Экспоненциальная задержка со случайным разбросом, чтобы повторы не шли волной"""
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=False)
+        return self._client
@@ -0,0 +1,34 @@
+"""Пакетная фиксация SQLiteRepository"""
+import asyncio
+from sqlalchemy import text
+from src.db.sqlite import SQLiteRepository
+
+
+def test_write_during_flush_is_committed(tmp_path):
+    """Запись, пришедшая во время фиксации предыдущего пакета, не зависает в очереди"""
+
+    async def scenario():
+        repo = SQLiteRepository(str(tmp_path / "review.db"), commit_interval=0.05)
+        flushing = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_op(session):
+            flushing.set()
+            await release.wait()
+            await session.execute(text("SELECT 1"))
+
+        async def fast_op(session):
+            await session.execute(text("SELECT 1"))
+
+        try:
+            first = asyncio.ensure_future(repo._write(slow_op))
+            await asyncio.wait_for(flushing.wait(), timeout=3)
+            second = asyncio.ensure_future(repo._write(fast_op))
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.wait_for(asyncio.gather(first, second), timeout=3)
+            assert repo._pending == []
+        finally:
+            await repo.close()
+
+    asyncio.run(scenario())